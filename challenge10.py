@@ -4,19 +4,10 @@
 
 from collections import namedtuple
 from itertools import count
-import re
 
-from common.grid import Point, Grid, get_manhattan_distance, get_average_point
-from common.input_file import get_transformed_input
+from common.grid import Point, get_manhattan_distance, get_average_point, render_points
+from common.input_file import read_integer_records
 
-def to_star(star_str):
-    """
-        Takes a star string and converts it to a star
-    """
-    regex = r"position=<\s*(-?\d+),\s*(-?\d+)> velocity=<\s*(-?\d+),\s* (-?\d+)>"
-    match = re.match(regex, star_str)
-    position = Point(int(match.group(1)), int(match.group(2)))
-    return Star(position, int(match.group(3)), int(match.group(4)))
 Star = namedtuple("Star", ["position", "velocity_x", "velocity_y"])
 
 def move_star(star):
@@ -27,25 +18,13 @@ def move_star(star):
     return Star(new_position, star.velocity_x, star.velocity_y)
 
 
-def starfill(positions, point):
-    """
-        Return a # if its a star, otherwise blank space
-    """
-    return "#" if point in positions else " "
-
 def draw_grid_and_counter(starpos, positions, counter):
     """
         Draw the grid given centered on starpos
     """
-    grid_params = {
-        "top": starpos.y - 20,
-        "bottom": starpos.y + 20,
-        "left": starpos.x - 100,
-        "right": starpos.x + 100,
-        "fill_function": lambda point: starfill(positions, point)
-    }
-    bounded_grid = Grid(**grid_params)
-    print(bounded_grid)
+    top_left = Point(starpos.x - 100, starpos.y - 20)
+    bottom_right = Point(starpos.x + 100, starpos.y + 20)
+    print(render_points(positions, top_left, bottom_right))
 
     print("*"* 80)
     print(counter)
@@ -62,6 +41,7 @@ def run_animation(stars):
             draw_grid_and_counter(stars[0].position, positions, counter)
         stars = [move_star(star) for star in stars]
 
-STARS = get_transformed_input("input/input10.txt", to_star)
+STARS = [Star(Point(x, y), velocity_x, velocity_y)
+         for x, y, velocity_x, velocity_y in read_integer_records("input/input10.txt", 4)]
 if __name__ == "__main__":
     run_animation(STARS)
@@ -2,8 +2,8 @@
     Advent of code Day 11 (It's ugly)
 """
 
-from itertools import product, chain
-from common.grid import Grid, Point
+from itertools import chain
+from common.grid import Grid
 
 SERIAL_NUMBER = 6303
 
@@ -28,25 +28,9 @@ def get_power_levels(grid, square=3):
     """
         Get the power levels of each square of a certain size (defaults to 3)
     """
-    initial = range(1, square+1)
-    power_level = sum(grid[Point(x, y)] for x, y in product(initial, initial))
-    yield (1, 1), power_level
-    for y_pos in range(grid.top + 1, grid.bottom - square):
-        power_level += sum(grid[Point(x, y_pos+square-1)] for x in initial)
-        power_level -= sum(grid[Point(x, y_pos-1)] for x in initial)
-        yield (1, y_pos, square), power_level
-
-    power_level = sum(grid[Point(x, y)] for x, y in product(initial, initial))
-    for x_pos in range(grid.left + 1, grid.right - square):
-        power_level += sum(grid[Point(x_pos + square-1, y)] for y in initial)
-        power_level -= sum(grid[Point(x_pos - 1, y)] for y in initial)
-        yield (x_pos, 1, square), power_level
-
-        y_power_level = power_level
-        for y_pos in range(grid.top + 1, grid.bottom - square):
-            y_power_level += sum(grid[Point(x, y_pos+square-1)] for x in range(x_pos, x_pos+square))
-            y_power_level -= sum(grid[Point(x, y_pos - 1)] for x in range(x_pos, x_pos+square))
-            yield (x_pos, y_pos, square), y_power_level
+    table = grid.get_summed_area_table()
+    for point, power_level in table.get_window_sums(square, square):
+        yield (point.x, point.y, square), power_level
 
 def get_all_power_levels(grid):
     """
@@ -3,6 +3,7 @@
 """
 
 from common.input_file import read_strings
+from common.simulation import Translation, fast_forward
 
 class PlantRow():
     """
@@ -50,6 +51,13 @@ class PlantRow():
     def __eq__(self, rhs):
         return self.state == rhs.state
 
+    def shift(self, distance):
+        """
+            Move the whole row of plants to the right
+        """
+        self.left_index += distance
+        return self
+
 def to_plant_instruction(plant_instruction):
     """
         Converts a triplet to a pair: pattern and result
@@ -69,14 +77,13 @@ def get_plants_sum(plant_info, num_generations):
     """
     plants = PlantRow(plant_info[0].split()[2], 0)
     plant_instructions = dict(to_plant_instruction(p.split()) for p in plant_info[2:])
-    for generation in range(num_generations):
-        old_plants = plants
+    def step(plants):
         new_plants = "".join(plant_instructions.get(p, ".") for p in plants.sliding_window())
         # we add 2 here to account for our padding shenanigans
-        plants = PlantRow(new_plants, get_left_most_plant_index(new_plants, plants.left_index + 2))
-        if old_plants == plants:
-            plants.left_index += (num_generations - generation - 1)
-            break
+        return PlantRow(new_plants, get_left_most_plant_index(new_plants, plants.left_index + 2))
+    # the plants settle into a pattern that drifts along the row
+    plants = fast_forward(plants, step, num_generations, fingerprint=lambda p: hash(p.state),
+                          translation=Translation(lambda p: p.left_index, PlantRow.shift))
     return plants.get_sum()
 
 INFO = read_strings("input/input12.txt")
@@ -4,7 +4,7 @@
 from itertools import chain, count
 from typing import List
 
-from common.grid import TextGrid, get_orthogonally_adjacent, Point
+from common.grid import TextGrid, Point
 from common.input_file import read_strings
 
 def is_player(_, character: str) -> bool:
@@ -31,8 +31,8 @@ class Battlefield:
         A battlefield class that tracks game state
     """
     def __init__(self, cave, elf_attack_power=3, stop_on_elf_death=False):
-        self.cave = TextGrid(cave, "#")
-        self.health = {p: 200 for p, _ in self.cave.get_characters(lambda _, v: v in "EG")}
+        self.cave = TextGrid(cave, "#", indexed="EG")
+        self.health = {p: 200 for p, _ in self.cave.get_characters(is_player)}
         self.elf_attack_power = elf_attack_power
         self.stop_on_elf_death = stop_on_elf_death
         self.dead = []
@@ -44,7 +44,7 @@ class Battlefield:
         """
             Return if one side is defeated
         """
-        return self.cave.get_characters("E") == [] or self.cave.get_characters("G") == []
+        return self.cave.count("E") == 0 or self.cave.count("G") == 0
 
     def did_all_elves_survive(self) -> bool:
         """
@@ -65,7 +65,8 @@ class Battlefield:
             (or if the first elf dies and stop on first elf death is true)
         """
         for round_number in count(1):
-            players = sort_by_reading_order(self.cave.get_characters(is_player))
+            players = sort_by_reading_order(self.cave.get_characters("E") +
+                                            self.cave.get_characters("G"))
             for position, player in players:
                 if self.is_any_side_defeated():
                     return (round_number -1) * sum(self.health.values())
@@ -120,15 +121,14 @@ class Battlefield:
         """
             Get a list of targets adjacent to an enemy
         """
-        orthogonal = [get_orthogonally_adjacent(p) for p, _ in self.cave.get_characters(desired)]
-        unique = list(set(chain.from_iterable(orthogonal)))
-        return [p for p in unique if self.cave[p] == "."]
+        orthogonal = [self.cave.get_adjacent(p, ".") for p, _ in self.cave.get_characters(desired)]
+        return list(set(chain.from_iterable(orthogonal)))
 
     def get_target(self, point: Point, desired: str):
         """
             Get the best target (check lowest HP, then reading order)
         """
-        potential = [p for p in get_orthogonally_adjacent(point) if self.cave[p] == desired]
+        potential = self.cave.get_adjacent(point, desired)
         if not potential:
             return None
         min_hp = min(self.health[p] for p in potential)
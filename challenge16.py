@@ -3,21 +3,15 @@
 """
 
 from collections import namedtuple
-from typing import Callable, List
-from re import split
+from typing import Dict, List
 
-from common.input_file import read_strings
-from common.opcodes import OPCODES
+from common.input_file import read_parsed_input, register_line_format
+from common.opcodes import OPCODES, OPERATIONS, Machine
 
-INPUT = read_strings("input/input16.txt")
-Sample = namedtuple("Sample", ["before", "opcode", "after"])
+BEFORE_FORMAT = register_line_format("Before", "Before: [{a:int}, {b:int}, {c:int}, {d:int}]")
+AFTER_FORMAT = register_line_format("After", "After:  [{a:int}, {b:int}, {c:int}, {d:int}]")
 
-def matches(sample, func) -> bool:
-    """
-        If the sample matches the function
-    """
-    _, in1, in2, out = sample.opcode
-    return func(in1, in2, out, list(sample.before)) == sample.after
+Sample = namedtuple("Sample", ["before", "opcode", "after"])
 
 def to_opcode(opcode: str) -> List[int]:
     """
@@ -30,27 +24,36 @@ def get_samples_and_program(input_data: List[str]):
         Get a list of samples and program
     """
     samples: List[Sample] = []
-    while input_data[0].startswith("Before:"):
-        line1, opcode, line3, _blank, *input_data = input_data
-        # We assume trusted input for these challenges, so we'll eval
-        before = [int(b) for b in split(r"Before: \[|, |\]", line1) if b]
-        after = [int(a) for a in split(r"After:  \[|, |\]", line3) if a]
+    index = 0
+    # each sample is four lines: before, opcode, after and a blank line
+    while index < len(input_data) and input_data[index].startswith("Before:"):
+        line1, opcode, line3 = input_data[index:index + 3]
+        before = list(BEFORE_FORMAT.parse(line1))
+        after = list(AFTER_FORMAT.parse(line3))
         samples.append(Sample(before, to_opcode(opcode), after))
-    return samples, [i for i in map(to_opcode, input_data) if i]
+        index += 4
+    return samples, [i for i in map(to_opcode, input_data[index:]) if i]
 
-SAMPLES, PROGRAM = get_samples_and_program(INPUT)
+SAMPLES, PROGRAM = read_parsed_input("input/input16.txt", get_samples_and_program)
 
-def get_matches(sample: Sample) -> List[Callable]:
+def get_candidate_mask(sample: Sample) -> int:
     """
-        Get a list of ops that match a sample
+        Get a mask of the ops that match a sample (bit n set if OPCODES[n] matches)
     """
-    return [op for op in OPCODES if matches(sample, op)]
+    _, in1, in2, out = sample.opcode
+    mask = 0
+    for bit, operation in enumerate(OPERATIONS):
+        registers = list(sample.before)
+        operation(in1, in2, out, registers)
+        if registers == sample.after:
+            mask |= 1 << bit
+    return mask
 
 def get_number_of_matches(sample: Sample) -> int:
     """
         Get a number of matches for a sample
     """
-    return len(get_matches(sample))
+    return bin(get_candidate_mask(sample)).count("1")
 
 def get_samples_matching_three_or_more(samples):
     """
@@ -58,29 +61,40 @@ def get_samples_matching_three_or_more(samples):
     """
     return len([sample for sample in samples if get_number_of_matches(sample) >= 3])
 
-def get_opcode_mapping(samples):
+def get_candidate_masks(samples) -> Dict[int, int]:
     """
-        Get the opcode mapping given all the samples
+        Get a mask of the ops each opcode number could be, given all the samples
     """
-    ops = {num: list(OPCODES) for num in range(16)}
+    masks = {num: (1 << len(OPCODES)) - 1 for num in range(16)}
     for sample in samples:
-        ops[sample.opcode[0]] = [op for op in ops[sample.opcode[0]] if op in get_matches(sample)]
-    while any(len(codes) > 1 for codes in ops.values()):
-        deduced_codes = [codes[0] for codes in ops.values() if len(codes) == 1]
-        for num, codes in ops.items():
-            if len(codes) > 1:
-                ops[num] = [c for c in codes if c not in deduced_codes]
-    return ops
+        masks[sample.opcode[0]] &= get_candidate_mask(sample)
+    return masks
+
+def get_opcode_mapping(samples):
+    """
+        Get the opcode mapping given all the samples
+        Whenever an opcode number is down to a single op, that op is removed from the rest
+    """
+    masks = get_candidate_masks(samples)
+    deduced = [num for num, mask in masks.items() if bin(mask).count("1") == 1]
+    while deduced:
+        num = deduced.pop()
+        for other, mask in masks.items():
+            if other != num and mask & masks[num]:
+                masks[other] = mask & ~masks[num]
+                if bin(masks[other]).count("1") == 1:
+                    deduced.append(other)
+    assert all(bin(mask).count("1") == 1 for mask in masks.values())
+    return {num: [OPCODES[mask.bit_length() - 1]] for num, mask in masks.items()}
 
 def get_program_results(samples, program):
     """
         Get the result of the program
     """
     ops = get_opcode_mapping(samples)
-    registers = [0, 0, 0, 0]
-    for opcode, in1, in2, out in program:
-        registers = ops[opcode][0](in1, in2, out, registers)
-    return registers[0]
+    machine = Machine([(ops[opcode][0], in1, in2, out) for opcode, in1, in2, out in program],
+                      number_of_registers=4)
+    return machine.run()[0]
 
 
 print(get_samples_matching_three_or_more(SAMPLES))
@@ -4,7 +4,8 @@
 from itertools import chain, product
 from typing import Callable, List, Iterable
 
-from common.grid import Point, Grid, to_bounded_grid, to_below, to_above, to_left, to_right
+from common.grid import (Point, Grid, CHARACTERS, to_dense_grid,
+                         to_below, to_above, to_left, to_right)
 from common.input_file import get_transformed_input
 PointMover = Callable[[Point], Point]
 def to_points(points_str: str) -> List[Point]:
@@ -157,12 +158,14 @@ def create_grid() -> WaterGrid:
     """
         Read a file and give al ist of points
     """
-    points = set(chain.from_iterable(get_transformed_input("input/input17.txt", to_points)))
+    veins = get_transformed_input("input/input17.txt", to_points, cache=True)
+    points = set(chain.from_iterable(veins))
 
-    def fill_function(point):
-        return "#" if point in points else "."
+    clay = to_dense_grid(points, ".", CHARACTERS, padding=(1, 0))
+    for point in points:
+        clay[point] = "#"
 
-    grid = WaterGrid(to_bounded_grid(points, fill_function, padding=(1, 0)))
+    grid = WaterGrid(clay)
     grid.run_water(Point(500, grid.grid.top -1))
     return grid
 
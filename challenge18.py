@@ -1,14 +1,24 @@
 """
     Day 18 Advent of Code 2018
 """
-from typing import Dict, Sequence
+from types import ModuleType
+from typing import Optional, Sequence
+
+np: Optional[ModuleType]
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 from common.input_file import read_strings
 from common.grid import TextGrid, Point
+from common.simulation import fast_forward
 
 OPEN = "."
 LUMBERYARD = "#"
 TREE = "|"
+# acres indexed by their integer code in the vectorized engine
+ACRES = OPEN + TREE + LUMBERYARD
 
 
 def transform(acre: str, surrounding: Sequence[str]) -> str:
@@ -29,7 +39,7 @@ def get_surrounding(grid: TextGrid, point: Point) -> Sequence[str]:
     """
         Get the surrounding characters
     """
-    return [acre for _, acre in grid.get_surrounding(point)]
+    return grid.get_surrounding_characters(point)
 
 def transform_grid(grid: TextGrid):
     """
@@ -39,37 +49,87 @@ def transform_grid(grid: TextGrid):
     for point, acre in values:
         grid[point] = acre
 
-def transform_over_time(grid: TextGrid, iterations: int):
+def to_codes(grid: TextGrid):
+    """
+        Encode the grid as a 2D array of acre codes (indexed by row, then column)
+    """
+    assert np is not None
+    rows = grid.get_rows()
+    codes = np.frombuffer("".join(rows).encode("latin-1"), dtype=np.uint8)
+    codes = codes.reshape((len(rows), -1))
+    lookup = np.zeros(256, dtype=np.uint8)
+    for code, acre in enumerate(ACRES):
+        lookup[ord(acre)] = code
+    return lookup[codes]
+
+def from_codes(grid: TextGrid, codes):
+    """
+        Write an array of acre codes back into the grid, only touching changed acres
+    """
+    assert np is not None
+    top_left = grid.get_top_left()
+    current = to_codes(grid)
+    for row, column in zip(*np.nonzero(current != codes)):
+        grid[Point(top_left.x + int(column), top_left.y + int(row))] = ACRES[codes[row, column]]
+
+def count_neighbours(mask):
+    """
+        Count the set cells in the 8 cells surrounding every cell of a boolean mask
     """
-        Transform the grid a bunch of times
+    height, width = mask.shape
+    padded = np.pad(mask.astype(np.uint8), 1)
+    counts = np.zeros((height, width), dtype=np.uint8)
+    for dy in range(3):
+        for dx in range(3):
+            if dy != 1 or dx != 1:
+                counts += padded[dy:dy + height, dx:dx + width]
+    return counts
+
+def transform_codes(codes):
+    """
+        Transform an array of acre codes through one iteration (see transform)
+    """
+    is_open, is_tree, is_lumberyard = (codes == code for code in range(len(ACRES)))
+    trees = count_neighbours(is_tree)
+    lumberyards = count_neighbours(is_lumberyard)
+    result = codes.copy()
+    result[is_open & (trees >= 3)] = ACRES.index(TREE)
+    result[is_tree & (lumberyards >= 3)] = ACRES.index(LUMBERYARD)
+    result[is_lumberyard & ((lumberyards == 0) | (trees == 0))] = ACRES.index(OPEN)
+    return result
+
+def transform_over_time_per_acre(grid: TextGrid, iterations: int):
+    """
+        Transform the grid a bunch of times, one acre at a time
     """
-    seen: Dict[str, int] = {}
-    for iteration in range(iterations):
+    def step(grid: TextGrid) -> TextGrid:
         transform_grid(grid)
-        if str(grid) in seen:
-
-            last_seen = seen[str(grid)]
-            cycle_length = iteration - last_seen
-            while iteration + cycle_length < iterations:
-                iteration += cycle_length
-            while iteration != iterations - 1:
-                iteration += 1
-                transform_grid(grid)
-            break
-        seen[str(grid)] = iteration
+        return grid
+    fast_forward(grid, step, iterations, fingerprint=TextGrid.get_fingerprint)
+
+def transform_over_time(grid: TextGrid, iterations: int):
+    """
+        Transform the grid a bunch of times (vectorized when numpy is available)
+    """
+    if np is None:
+        transform_over_time_per_acre(grid, iterations)
+    else:
+        codes = fast_forward(to_codes(grid), transform_codes, iterations,
+                             fingerprint=lambda codes: hash(codes.tobytes()))
+        from_codes(grid, codes)
 
 def get_total_resource_value(grid: TextGrid) -> int:
     """
         Get the total resource value
     """
-    return len(grid.get_characters(TREE)) * len(grid.get_characters(LUMBERYARD))
+    return grid.count(TREE) * grid.count(LUMBERYARD)
 
 
-GRID = TextGrid(read_strings("input/input18.txt"), default=".")
+GRID = TextGrid(read_strings("input/input18.txt"), default=".", indexed=(TREE, LUMBERYARD))
 if __name__ == "__main__":
     transform_over_time(GRID, 10)
     print(get_total_resource_value(GRID))
 
-    GRID = TextGrid(read_strings("input/input18.txt"), default=".")
+    GRID = TextGrid(read_strings("input/input18.txt"), default=".", indexed=(TREE, LUMBERYARD))
     transform_over_time(GRID, 1_000_000_000)
     print(get_total_resource_value(GRID))
@@ -9,24 +9,13 @@ from common.input_file import read_strings
 def get_checksum(box_ids):
     """
         Get the checksum of all the box IDs
-        Expects the box ids to be grouped and sorted
     """
-    grouped_box_ids = [Counter(box_id) for box_id in box_ids]
-
-    return (
-        get_number_of_boxes_with_exact_letters(grouped_box_ids, 2) *
-        get_number_of_boxes_with_exact_letters(grouped_box_ids, 3)
-    )
-
-
-def get_number_of_boxes_with_exact_letters(grouped_box_ids, desired_count):
-    """
-        Gets the count of boxes where we have exactly `desired_count`
-        number of one letter in it
-    """
-    candidates = [
-        True for box in grouped_box_ids if contains_desired_count(box, desired_count)]
-    return len(candidates)
+    twos = threes = 0
+    for box_id in box_ids:
+        box = Counter(box_id)
+        twos += contains_desired_count(box, 2)
+        threes += contains_desired_count(box, 3)
+    return twos * threes
 
 
 def contains_desired_count(box, desired_count):
@@ -1,7 +1,6 @@
 """
     Advent of Code Day 20
 """
-from operator import itemgetter
 from typing import Set
 from common.graph import Graph
 from common.grid import Point, to_above, to_below, to_left, to_right
@@ -24,11 +23,13 @@ class Map:
         A map of the cave system
     """
     def __init__(self, regex):
-        self.graph = Graph()
+        graph = Graph()
         self.origin = Point(0, 0)
-        self.parse_regex(regex, set([self.origin]))
+        self.parse_regex(regex, set([self.origin]), graph)
+        # the map is only searched from here on, so keep a compact copy
+        self.graph = graph.freeze()
 
-    def parse_regex(self, regex: str, nodes: Set[Point]) -> Set[Point]:
+    def parse_regex(self, regex: str, nodes: Set[Point], graph: Graph) -> Set[Point]:
         """
             Parse the regular expression filtering out (|)
         """
@@ -41,14 +42,14 @@ class Map:
             elif character == ")":
                 start = parens_stack.pop()
                 if not parens_stack:
-                    nodes = next_points | self.parse_regex(regex[start + 1:index], nodes)
+                    nodes = next_points | self.parse_regex(regex[start + 1:index], nodes, graph)
             elif len(parens_stack) == 1 and character == "|":
                 start = parens_stack.pop()
-                next_points = next_points | self.parse_regex(regex[start + 1: index], nodes)
+                next_points = next_points | self.parse_regex(regex[start + 1: index], nodes, graph)
                 parens_stack.append(index)
             elif not parens_stack:
                 for node in nodes:
-                    self.graph.add_edge(node, get_next_point(character, node))
+                    graph.add_edge(node, get_next_point(character, node))
                 nodes = {get_next_point(character, node) for node in nodes}
 
         assert parens_stack == []
@@ -58,13 +59,13 @@ class Map:
         """
             Get the maximum distance from the origin
         """
-        return max(self.graph.get_node_distances(self.origin), key=itemgetter(0))[0]
+        return self.graph.get_max_distance(self.origin)
 
     def get_number_of_rooms_at_least_distance_away(self, distance: int) -> int:
         """
             Get the number of rooms at least a certain distance away
         """
-        return len([_ for d, _ in self.graph.get_node_distances(self.origin) if d >= distance])
+        return self.graph.count_at_least_distance(self.origin, distance)
 
 REGEX = read_single_line("input/input20.txt")
 assert REGEX[0] == "^" and REGEX[-1] == "$"
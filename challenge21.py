@@ -1,31 +1,12 @@
 """
     Advent of Code day 21
 """
-from typing import Iterable, Set
+from common.device import get_compared_values, read_program
 
-def get_halting_numbers() -> Iterable[int]:
-    """
-        Get a list of halting numbers
-        Derived this from the assembly
-    """
-    seen: Set[int] = set()
-    d_reg = 65536
-    e_reg = 4332021
-    while True:
-        e_reg += (d_reg & 255)
-        e_reg *= 65899
-        e_reg = e_reg & 0xFFFFFF
-        if d_reg < 256:
-            if e_reg in seen:
-                break
-            seen.add(e_reg)
-            yield e_reg
-            d_reg = e_reg | 65536
-            e_reg = 4332021
-        else:
-            d_reg = d_reg // 256
-
-HALTING_NUMBERS = list(get_halting_numbers())
+# the program halts once register 0 matches the number it works out each time round,
+# so the first number halts it soonest and the last one before they repeat latest
+INSTRUCTION_REGISTER, INSTRUCTIONS = read_program("input/input21.txt")
+HALTING_NUMBERS = list(get_compared_values(INSTRUCTIONS, INSTRUCTION_REGISTER, 0, [0] * 6))
 
 if __name__ == "__main__":
     print(HALTING_NUMBERS[0], HALTING_NUMBERS[-1])
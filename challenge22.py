@@ -2,8 +2,17 @@
     Day 22 of Advent of Code 2018
 """
 import heapq
-from typing import Set, List, Tuple
-from common.grid import to_bounded_grid, Point, to_above, to_left, get_orthogonally_adjacent
+from typing import Dict, Optional, Set, List, Tuple
+from common.grid import (LazyGrid, Point, to_above, to_left, to_packed, from_packed,
+                         get_packed_orthogonally_adjacent)
+
+TOOLS = ["torch", "climbing", "neither"]
+# the tools that can be used in each region type
+TRAVERSABLE = [
+    ["torch", "climbing"],
+    ["climbing", "neither"],
+    ["torch", "neither"]
+]
 
 class Cave:
     """
@@ -13,9 +22,9 @@ class Cave:
     def __init__(self, target: Point, depth: int):
         self.target = target
         self.depth = depth
-        self.grid = to_bounded_grid([Point(0, 0), self.target])
-        for point in self.grid:
-            self.grid[point] = self.get_geologic_level(point)
+        # the cave extends forever down and to the right, so only work out what we visit
+        self.grid = LazyGrid(top=0, left=0, fill_function=self.get_geologic_level)
+        self.packed_regions: Dict[int, Optional[int]] = {}
 
     def get_geologic_level(self, point: Point) -> int:
         """
@@ -41,6 +50,15 @@ class Cave:
         """
         return self.get_erosion_level(point) % 3
 
+    def get_packed_region(self, packed: int) -> Optional[int]:
+        """
+            Get the region type of a packed point (None if it is outside the cave)
+        """
+        if packed not in self.packed_regions:
+            point = from_packed(packed)
+            self.packed_regions[packed] = self.get_region(point) if point in self.grid else None
+        return self.packed_regions[packed]
+
     def get_total_risk_level(self) -> int:
         """
             Return the total risk level
@@ -49,71 +67,52 @@ class Cave:
         bounded_points = self.grid.get_bounded_points(origin, self.target)
         return sum(self.get_region(point) for point, _ in bounded_points)
 
-    def can_traverse(self, equipment: str, point: Point) -> bool:
-        """
-            Return if we can traverse to the next point
-        """
-        region_type = self.get_region(point)
-        traversable = [
-            ["torch", "climbing"],
-            ["climbing", "neither"],
-            ["torch", "neither"]
-        ]
-        return equipment in traversable[region_type]
-
-    def grow_if_needed(self, points: List[Point]):
-        """
-            Grow the grid down and to the right
-        """
-        if any(p not in self.grid for p in points):
-            right = self.grid.right + 1
-            bottom = self.grid.bottom + 1
-            for y_pos in range(self.grid.top, bottom):
-                new_point = Point(right, y_pos)
-                self.grid[new_point] = self.get_geologic_level(new_point)
-            for x_pos in range(self.grid.left, right + 1):
-                new_point = Point(x_pos, bottom)
-                self.grid[new_point] = self.get_geologic_level(new_point)
-
 
-Move = Tuple[int, Point, str]
+# moves are (distance, packed point, index into TOOLS)
+Move = Tuple[int, int, int]
 def get_toolchanges(move: Move, cave: Cave) -> List[Move]:
     """
         Get a list of toolchanges
     """
-    distance, point, equipment = move
-    tools = [t for t in ["torch", "climbing", "neither"] if t != equipment]
-    return [(distance+7, point, e) for e in tools if cave.can_traverse(e, point)]
+    distance, packed, equipment = move
+    region = cave.get_packed_region(packed)
+    if region is None:
+        raise ValueError(f"{from_packed(packed)} is outside the cave")
+    traversable = TRAVERSABLE[region]
+    return [(distance+7, packed, e) for e, tool in enumerate(TOOLS)
+            if e != equipment and tool in traversable]
 
 def get_adjacent_moves(move: Move, cave: Cave) -> List[Move]:
     """
         Get the adjacent moves
-        Will grow the grid if necessary
     """
-    distance, point, equip = move
-    moves = [p for p in get_orthogonally_adjacent(point) if p.x >= 0 and p.y >= 0]
-    in_grid = [m for m in moves if m.x >= 0 and m.y >= 0]
-    cave.grow_if_needed(in_grid)
-    return [(distance+1, m, equip) for m in in_grid if cave.can_traverse(equip, m)]
+    distance, packed, equip = move
+    tool = TOOLS[equip]
+    regions = [(p, cave.get_packed_region(p)) for p in get_packed_orthogonally_adjacent(packed)]
+    return [(distance+1, p, equip) for p, region in regions
+            if region is not None and tool in TRAVERSABLE[region]]
 
 
 def get_fewest_minutes(cave: Cave) -> int:
     """
         Get the fewest minutes until the target
     """
-    origin = Point(0, 0)
-    seen: Set[Tuple[Point, str]] = set()
-    nodes = [(0, origin, "torch")]
+    torch = TOOLS.index("torch")
+    target = to_packed(cave.target)
+    # (packed point, tool) pairs are packed again into a single int
+    seen: Set[int] = set()
+    nodes = [(0, to_packed(Point(0, 0)), torch)]
     min_distance = (cave.target.x + cave.target.y) * 8
     while nodes:
         move = heapq.heappop(nodes)
-        if (move[1], move[2]) in seen:
+        if move[1] * len(TOOLS) + move[2] in seen:
             continue
-        if move[1] == cave.target and move[2] == "torch":
+        if move[1] == target and move[2] == torch:
             min_distance = min(min_distance, move[0])
-        seen.add((move[1], move[2]))
+        seen.add(move[1] * len(TOOLS) + move[2])
         next_moves = get_toolchanges(move, cave) + get_adjacent_moves(move, cave)
-        next_moves = [m for m in next_moves if m[0] < min_distance and (m[1], m[2]) not in seen]
+        next_moves = [m for m in next_moves
+                      if m[0] < min_distance and m[1] * len(TOOLS) + m[2] not in seen]
         for new_move in next_moves:
             heapq.heappush(nodes, new_move)
     return min_distance
@@ -5,21 +5,14 @@
 from collections import namedtuple
 import heapq
 from itertools import product
-from re import split
 from typing import List
 
-from common.input_file import get_transformed_input
+from common.distances import PointSet
+from common.input_file import read_integer_records
 from common.grid import get_manhattan_distance
 
 Nanobot = namedtuple("Nanobot", ["x", "y", "z", "radius"])
 
-def to_nanobot(nanobot: str) -> Nanobot:
-    """
-        Convert a string to a nanobot
-    """
-    _, x_pos, y_pos, z_pos, radius = split(r"pos=<|,|>, r=", nanobot)
-    return Nanobot(int(x_pos), int(y_pos), int(z_pos), int(radius))
-
 def get_distance(bot1: Nanobot, bot2: Nanobot) -> int:
     """
         Get the distance between two nanobots
@@ -31,8 +24,9 @@ def get_number_of_nanobots_within_strongest_range(nanobots) -> int:
         Get number of nanobots within range of the strongest
     """
     strongest = max(nanobots, key=lambda n: n.radius)
-    within_range = [n for n in nanobots if get_distance(strongest, n) < strongest.radius]
-    return len(within_range)
+    positions = PointSet((n.x, n.y, n.z) for n in nanobots)
+    # strictly less than the radius
+    return positions.count_within((strongest.x, strongest.y, strongest.z), strongest.radius - 1)
 
 def get_radius_resolution(nanobot: Nanobot, resolution: int):
     """
@@ -50,12 +44,11 @@ def get_points(cube: Cube, nanobots: List[Nanobot], resolution: int):
     xes = range(cube.min_x // resolution, (cube.max_x // resolution))
     yes = range(cube.min_y // resolution, (cube.max_y // resolution))
     zes = range(cube.min_z // resolution, (cube.max_z // resolution))
-    def is_within_range(bot, xpos, ypos, zpos):
-        nanobot_point = (bot.x // resolution, bot.y // resolution, bot.z // resolution)
-        distance = get_manhattan_distance(nanobot_point, (xpos, ypos, zpos))
-        return distance <= get_radius_resolution(bot, resolution)
-    for xpos, ypos, zpos in product(xes, yes, zes):
-        yield (xpos, ypos, zpos), [n for n in nanobots if is_within_range(n, xpos, ypos, zpos)]
+    positions = PointSet((n.x // resolution, n.y // resolution, n.z // resolution)
+                         for n in nanobots)
+    radii = [get_radius_resolution(n, resolution) for n in nanobots]
+    for point in product(xes, yes, zes):
+        yield point, [nanobots[i] for i in positions.get_indices_within(point, radii)]
 
 def get_initial_cube(nanobots) -> Cube:
     """
@@ -115,6 +108,6 @@ def get_most_intersections(nanobots):
                     searchsquare = (-len(next_bots), -resolution // 10, distance, next_point)
                     heapq.heappush(squares_to_check, searchsquare)
 
-NANOBOTS = get_transformed_input("input/input23.txt", to_nanobot)
+NANOBOTS = [Nanobot(*record) for record in read_integer_records("input/input23.txt", 4)]
 print(get_number_of_nanobots_within_strongest_range(NANOBOTS))
 print(get_most_intersections(NANOBOTS))
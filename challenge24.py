@@ -4,7 +4,15 @@
 from itertools import count
 import re
 from typing import List
-from common.input_file import read_strings
+from common.input_file import read_strings, register_line_format
+
+# the weaknesses and immunities in parentheses (which are optional)
+TRAITS = (r"(?:\([^\)]*\) )?", lambda traits: traits.strip("() "))
+ARMY_FORMAT = register_line_format(
+    "ArmyFormat",
+    "{units:int} units each with {hit_points:int} hit points {traits:traits}with an attack "
+    "that does {attack:int} {attack_type:word} damage at initiative {initiative:int}",
+    types={"traits": TRAITS})
 
 class Army:
     """
@@ -80,17 +88,10 @@ def to_army(army_str: str) -> Army:
     """
         Convert the string to an Army
     """
-    match = re.match(r"(\d+) units each with (\d+) hit points (?:\(([^\)]*)\) )?"+
-                     r"with an attack that does (\d+) (\w+) damage at initiative (\d+)", army_str)
-    assert match is not None, army_str
-    groups = match.groups()
-    army = Army(int(groups[0]), int(groups[1]), int(groups[-1]))
-
-    weaknesses = get_weaknesses(groups[2]) if groups[2] is not None else []
-    immunities = get_immunities(groups[2]) if groups[2] is not None else []
-
-    army.set_immunities_and_weaknesses(immunities, weaknesses)
-    army.set_attack(int(groups[-3]), groups[-2])
+    record = ARMY_FORMAT.parse(army_str)
+    army = Army(record.units, record.hit_points, record.initiative)
+    army.set_immunities_and_weaknesses(get_immunities(record.traits), get_weaknesses(record.traits))
+    army.set_attack(record.attack, record.attack_type)
     return army
 
 def parse_immune_and_infection(armies: List[str]):
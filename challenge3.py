@@ -3,19 +3,19 @@
 """
 from collections import Counter
 from itertools import chain
-import re
 
-from common.input_file import get_transformed_input
-from common.grid import Grid
+from common.input_file import register_line_format
+from common.grid import LazyGrid
 
+CLAIM_FORMAT = register_line_format("Claim",
+                                    "{claim_id}@{left:int},{top:int}:{width:int}x{height:int}")
 
-def get_claim(claim):
+def to_claim(record):
     """
-        Transform a claim to an ID and a list of points
+        Transform a parsed claim to an ID and a list of points
     """
-    claim_id, left, top, width, height = re.split(r"@|,|:|x", claim)
-    left, top, width, height = int(left), int(top), int(width), int(height)
-    points = Grid(top=top, bottom=top + height - 1, left=left, right=left + width -1)
+    claim_id, left, top, width, height = record
+    points = LazyGrid(top=top, bottom=top + height - 1, left=left, right=left + width -1)
     return (claim_id, points)
 
 
@@ -48,7 +48,7 @@ def get_non_overlapping_claim(claims, claimed_squares):
         assert False, "We should never hit this line, as this means we didn't find an answer"
 
 
-CLAIMS = get_transformed_input("input/input3.txt", get_claim)
+CLAIMS = [to_claim(record) for record in CLAIM_FORMAT.read("input/input3.txt")]
 CLAIMED_SQUARES = get_claimed_squares(CLAIMS)
 
 if __name__ == "__main__":
@@ -3,9 +3,11 @@
 """
 from collections import abc, Counter
 import datetime as dt
-import re
 
-from common.input_file import get_transformed_input
+from common.input_file import get_transformed_input, register_line_format
+
+RECORD_FORMAT = register_line_format(
+    "RecordFormat", "[{year:int}-{month:int}-{day:int} {hour:int}:{minute:int}] {text}")
 
 # man I want a tagged union or ADT for this
 def get_action(text):
@@ -24,7 +26,7 @@ def get_id(text):
         Return the guard number if in text else None
     """
     # I also want an optional type
-    return text[2] if "Guard" in text else None
+    return text[1] if "Guard" in text else None
 
 
 class Record:
@@ -40,11 +42,10 @@ class Record:
         """
             Constructor -> takes a string in the format [yyyy-mm-dd hh:mm] <Action>
         """
-        _blank, year, month, day, hour, minute, * \
-            text = re.split(r"\[|\]|\s|-|\:", record)
-        assert year == "1518"
-        self.date = dt.datetime(int(year), int(
-            month), int(day), int(hour), int(minute))
+        year, month, day, hour, minute, words = RECORD_FORMAT.parse(record)
+        assert year == 1518
+        self.date = dt.datetime(year, month, day, hour, minute)
+        text = words.split()
         self.action = get_action(text)
         self.guard_id = get_id(text)
 
@@ -186,7 +187,7 @@ def get_most_likely_to_sleep_guard_strategy_2(guards):
     return guard.guard_id * guard.get_most_likely_minute_to_sleep()
 
 
-RECORDS = sorted(get_transformed_input("input/input4.txt", Record))
+RECORDS = sorted(get_transformed_input("input/input4.txt", Record, cache=True))
 GUARDS = get_guard_log(RECORDS)
 if __name__ == "__main__":
     print(get_most_likely_to_sleep_guard_strategy_1(GUARDS))
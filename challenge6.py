@@ -2,41 +2,79 @@
     Advent of code Day 6
 """
 from collections import Counter
-from common.grid import to_bounded_grid, to_point, is_equidistant, get_manhattan_distance
+from typing import Dict, List, Union
+from common.grid import DenseGrid, Point, to_dense_grid, to_point
 from common.input_file import get_transformed_input
 
 TIED = "."
 
-def get_closest_point(point, points):
+def get_closest_points(points: List[Point]) -> DenseGrid:
     """
-        Get Closest point to the current point or "." if tied
+        Get a grid of the closest point to every point in the bounding rectangle (or TIED)
+        A breadth first search from every point at once reaches each point from all of
+        its closest points in the same step, so it is tied if they don't agree
     """
-    closest_point = min(points, key=lambda p: get_manhattan_distance(p, point))
-    closest_points = [p for p in points if is_equidistant(point, p, closest_point)]
-    return closest_point if len(closest_points) == 1 else TIED
+    grid = to_dense_grid(points)
+    for point in points:
+        grid[point] = point
+    frontier = list(points)
+    while frontier:
+        closest: Dict[Point, Union[Point, str]] = {}
+        for point in frontier:
+            for neighbour in grid.get_neighbours(point):
+                if grid[neighbour] is None:
+                    if closest.setdefault(neighbour, grid[point]) != grid[point]:
+                        closest[neighbour] = TIED
+        for point, closest_point in closest.items():
+            grid[point] = closest_point
+        frontier = list(closest)
+    return grid
 
 def get_largest_finite_region(points):
     """
         Get the largest finite region
     """
-    grid = to_bounded_grid(points, lambda point: get_closest_point(point, points))
+    grid = get_closest_points(points)
     boundaries = set(grid[p] for p in grid.get_boundary_points() if grid[p] != TIED)
     counter = Counter(closest for closest in grid.values() if closest not in boundaries)
     return counter.most_common(1)[0][1]
 
-def get_safest_finite_region(points):
+def get_safest_finite_region(points, threshold=10000):
     """
-        Get the safest finite region
+        Get the size of the region whose summed distance to every point is under the threshold
+        The summed distance is the summed x distance plus the summed y distance, so only
+        those two are worked out (for each column and each row) and then paired up
     """
-    grid = to_bounded_grid(points)
-    distances = (get_summed_distance(p, points) for p in grid)
-    return len([d for d in distances if d < 10000])
+    # every step outside the points adds len(points) to the summed distance
+    margin = threshold // len(points) + 1
+    x_sums = sorted(get_summed_distances_1d([p.x for p in points], margin))
+    y_sums = sorted(get_summed_distances_1d([p.y for p in points], margin))
+    count = 0
+    y_index = len(y_sums)
+    for x_sum in x_sums:
+        while y_index and x_sum + y_sums[y_index - 1] >= threshold:
+            y_index -= 1
+        count += y_index
+    return count
 
-def get_summed_distance(point, points):
+def get_summed_distances_1d(coordinates: List[int], margin: int) -> List[int]:
     """
-        Return a summed manhattan distance from this point to all other points)
+        Get the summed distance to all the coordinates for every position from
+        margin before the lowest coordinate to margin after the highest
     """
-    return sum(get_manhattan_distance(p, point) for p in points)
+    coordinates = sorted(coordinates)
+    position = coordinates[0] - margin
+    summed = sum(c - position for c in coordinates)
+    passed = 0
+    sums = []
+    while position <= coordinates[-1] + margin:
+        sums.append(summed)
+        while passed < len(coordinates) and coordinates[passed] <= position:
+            passed += 1
+        # moving one step right gets closer to everything ahead and further from the rest
+        summed += passed - (len(coordinates) - passed)
+        position += 1
+    return sums
 
 POINTS = get_transformed_input("input/input6.txt", to_point)
 if __name__ == "__main__":
@@ -25,13 +25,7 @@ def get_topologically_sorted_steps(steps):
     """
         Topologically sort the steps
     """
-    graph = create_graph(steps)
-    out = ""
-    while graph:
-        node = sorted(graph.get_roots())[0]
-        out += node
-        graph.remove_node(node)
-    return out
+    return "".join(create_graph(steps).get_topological_order())
 
 class Worker:
     """
@@ -2,7 +2,7 @@
     Advent of Code 2018
 """
 
-from common.input_file import read_single_line
+from common.input_file import read_integers
 class Tree:
     """
         A simple recrusive tree structure
@@ -51,8 +51,7 @@ def create_tree(tree_iter):
     tree.metadata = [next(tree_iter) for _ in range(num_metadata)]
     return tree
 
-TREE_INPUT = read_single_line("input/input8.txt")
-TREE = create_tree(iter(map(int, TREE_INPUT.split())))
+TREE = create_tree(iter(read_integers("input/input8.txt")))
 if __name__ == "__main__":
 
     print(TREE.get_metadata_sum())
@@ -0,0 +1,431 @@
+"""
+    A module for running device programs (lists of opcodes with an instruction pointer
+    bound to a register) that spots hot loops as it goes
+
+    Every jump backwards is counted, and once a loop has gone round HOT_LOOP_THRESHOLD
+    times its instructions are matched against some common idioms (LOOP_IDIOMS). A loop
+    that matches is skipped from then on by working out where it finishes directly
+"""
+from collections import Counter, namedtuple
+import struct
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from common.input_file import read_strings
+from common.opcodes import OPCODE_MAPPING, Instruction, Machine, get_opcode_name
+
+HOT_LOOP_THRESHOLD = 16
+
+# opcodes whose two inputs can be given either way round
+COMMUTATIVE = {"addr", "mulr", "banr", "borr", "eqrr"}
+
+Idiom = namedtuple("Idiom", ["name", "pattern", "skip"])
+
+def to_instruction(text: str) -> Instruction:
+    """
+        Convert a line such as "addi 2 16 2" to an instruction
+    """
+    name, *operands = text.split()
+    value1, value2, output = map(int, operands)
+    return OPCODE_MAPPING[name], value1, value2, output
+
+def read_program(file_name: str) -> Tuple[int, List[Instruction]]:
+    """
+        Read a program, which starts with the instruction pointer register ("#ip 2")
+    """
+    lines = read_strings(file_name)
+    return int(lines[0].split()[-1]), list(map(to_instruction, lines[1:]))
+
+def to_pattern(text: str) -> List[List[str]]:
+    """
+        Convert an idiom to a list of instruction patterns, one per line, whose operands are:
+            ip      the instruction pointer register
+            @N      a jump to the Nth instruction of the pattern (it is incremented after)
+            _       anything
+            a number that exact value
+            a lowercase name a register (different names are different registers)
+            an uppercase name a constant
+    """
+    return [line.split() for line in text.strip().splitlines()]
+
+def get_divisors(number: int) -> List[int]:
+    """
+        Get the divisors of a positive number from its prime factors
+    """
+    divisors = [1]
+    factor = 2
+    while number > 1:
+        if factor * factor > number:
+            factor = number
+        power = 0
+        while number % factor == 0:
+            number //= factor
+            power += 1
+        divisors = [d * factor ** p for d in divisors for p in range(power + 1)]
+        factor += 1
+    return divisors
+
+def skip_counted_increment(registers: List[int], roles: Dict[str, int]) -> bool:
+    """
+        c goes up by one until it is past n
+    """
+    registers[roles["c"]] = max(registers[roles["c"]], registers[roles["n"]]) + 1
+    registers[roles["t"]] = 1
+    return True
+
+def skip_division(registers: List[int], roles: Dict[str, int]) -> bool:
+    """
+        c goes up by one until (c + 1) * K is past d, which is where c reaches d // K
+    """
+    if roles["K"] < 1 or registers[roles["c"]] < 0:
+        return False
+    registers[roles["c"]] = max(registers[roles["c"]], registers[roles["d"]] // roles["K"])
+    registers[roles["t"]] = 1
+    return True
+
+def skip_divisor_test(registers: List[int], roles: Dict[str, int]) -> bool:
+    """
+        b goes up by one until it is past n, adding a to s if a * b is n on the way
+    """
+    a, b, n = (registers[roles[role]] for role in "abn")
+    if min(a, b, n) < 0:
+        return False
+    if a and n % a == 0 and b <= n // a:
+        registers[roles["s"]] += a
+    registers[roles["b"]] = max(b, n) + 1
+    registers[roles["t"]] = 1
+    return True
+
+def skip_divisor_sum(registers: List[int], roles: Dict[str, int]) -> bool:
+    """
+        a goes up by one until it is past n, adding a to s whenever it divides n
+        (by trying every b from 1 to n, as in skip_divisor_test)
+    """
+    a, n = registers[roles["a"]], registers[roles["n"]]
+    if a < 1 or n < 1:
+        return False
+    registers[roles["s"]] += sum(d for d in get_divisors(n) if d >= a)
+    registers[roles["a"]] = max(a, n) + 1
+    registers[roles["b"]] = n + 1
+    registers[roles["t"]] = 1
+    return True
+
+LOOP_IDIOMS = [
+    Idiom("counted increment", to_pattern("""
+        addi c 1 c
+        gtrr c n t
+        addr t ip ip
+        seti @0 _ ip
+    """), skip_counted_increment),
+    Idiom("division", to_pattern("""
+        addi c 1 t
+        muli t K t
+        gtrr t d t
+        addr t ip ip
+        addi ip 1 ip
+        seti @8 _ ip
+        addi c 1 c
+        seti @0 _ ip
+    """), skip_division),
+    Idiom("divisor test", to_pattern("""
+        mulr a b t
+        eqrr t n t
+        addr t ip ip
+        addi ip 1 ip
+        addr a s s
+        addi b 1 b
+        gtrr b n t
+        addr t ip ip
+        seti @0 _ ip
+    """), skip_divisor_test),
+    Idiom("divisor sum", to_pattern("""
+        seti 1 _ b
+        mulr a b t
+        eqrr t n t
+        addr t ip ip
+        addi ip 1 ip
+        addr a s s
+        addi b 1 b
+        gtrr b n t
+        addr t ip ip
+        seti @1 _ ip
+        addi a 1 a
+        gtrr a n t
+        addr t ip ip
+        seti @0 _ ip
+    """), skip_divisor_sum)
+]
+
+def match_operand(token: str, value: int, roles: Dict[str, int], ip_register: int,
+                  start: int) -> Optional[Dict[str, int]]:
+    """
+        Match an operand against a token from a pattern, returning the roles it binds
+        (or None if it doesn't match)
+    """
+    if token == "_":
+        matched = True
+    elif token == "ip":
+        matched = value == ip_register
+    elif token.startswith("@"):
+        matched = value == start + int(token[1:]) - 1
+    elif token.isdigit():
+        matched = value == int(token)
+    elif token in roles:
+        matched = roles[token] == value
+    elif token.isupper():
+        return {**roles, token: value}
+    else:
+        registers = {roles[role] for role in roles if role.islower()}
+        matched = value != ip_register and value not in registers
+        return {**roles, token: value} if matched else None
+    return roles if matched else None
+
+def match_instructions(pattern: Sequence[List[str]], instructions: Sequence[Instruction],
+                       ip_register: int, start: int,
+                       roles: Dict[str, int]) -> Optional[Dict[str, int]]:
+    """
+        Match instructions against a pattern, returning the registers and constants that
+        each name in the pattern stands for (or None if they don't match)
+    """
+    if not pattern:
+        return roles
+    (name, *tokens), (opcode, *values) = pattern[0], instructions[0]
+    if get_opcode_name(opcode) != name:
+        return None
+    orders = [values, [values[1], values[0], values[2]]] if name in COMMUTATIVE else [values]
+    for ordered_values in orders:
+        bound: Optional[Dict[str, int]] = roles
+        for token, value in zip(tokens, ordered_values):
+            if bound is not None:
+                bound = match_operand(token, value, bound, ip_register, start)
+        if bound is not None:
+            bound = match_instructions(pattern[1:], instructions[1:], ip_register, start, bound)
+        if bound is not None:
+            return bound
+    return None
+
+Shortcut = namedtuple("Shortcut", ["idiom", "roles", "end"])
+
+def find_shortcut(instructions: Sequence[Instruction], ip_register: int, start: int,
+                  end: int) -> Optional[Shortcut]:
+    """
+        Find an idiom for the loop from instruction start to instruction end (inclusive)
+    """
+    for idiom in LOOP_IDIOMS:
+        if len(idiom.pattern) == end - start + 1:
+            roles = match_instructions(idiom.pattern, instructions[start:end + 1],
+                                       ip_register, start, {})
+            if roles is not None:
+                return Shortcut(idiom, roles, end)
+    return None
+
+class HotLoops:
+    """
+        The backward jumps a program has taken, the (start, end) jumps that have been
+        taken HOT_LOOP_THRESHOLD times (and so have been looked at), and the loops that
+        could be skipped (by the instruction they start at)
+    """
+    __slots__ = ["instructions", "ip_register", "back_edges", "hot_jumps", "shortcuts"]
+
+    def __init__(self, instructions: Sequence[Instruction], ip_register: int):
+        self.instructions = instructions
+        self.ip_register = ip_register
+        self.back_edges: Counter = Counter()
+        self.hot_jumps: Set[Tuple[int, int]] = set()
+        self.shortcuts: Dict[int, List[Shortcut]] = {}
+
+    def jump(self, start: int, end: int):
+        """
+            Count a jump from instruction end back to instruction start, looking for a
+            shortcut once the loop is hot
+        """
+        self.back_edges[start, end] += 1
+        if self.back_edges[start, end] == HOT_LOOP_THRESHOLD:
+            self.hot_jumps.add((start, end))
+            found = find_shortcut(self.instructions, self.ip_register, start, end)
+            if found is not None:
+                self.shortcuts.setdefault(start, []).append(found)
+
+    def skip(self, ip: int, registers: List[int]) -> Optional[Shortcut]:
+        """
+            Skip a loop that starts at ip if one of its shortcuts applies to the registers
+            (None if they don't)
+        """
+        return next((shortcut for shortcut in self.shortcuts.get(ip, ())
+                     if shortcut.idiom.skip(registers, shortcut.roles)), None)
+
+# each trace record is the step, the instruction pointer and the number of registers,
+# followed by the registers after the instruction ran
+TRACE_HEADER = struct.Struct("<QIB")
+
+class TraceWriter:
+    """
+        A binary trace of every sample_every-th step of a program (see read_trace)
+    """
+    __slots__ = ["sample_every", "trace"]
+
+    def __init__(self, sample_every: int = 0):
+        self.sample_every = sample_every
+        self.trace = bytearray()
+
+    def write(self, step: int, ip: int, registers: Sequence[int]):
+        """
+            Write a step to the trace if it is one of the samples
+        """
+        if self.sample_every and step % self.sample_every == 0:
+            self.trace += TRACE_HEADER.pack(step, ip, len(registers))
+            self.trace += struct.pack(f"<{len(registers)}q", *registers)
+
+    def read(self) -> Iterable[Tuple[int, int, List[int]]]:
+        """
+            Read the trace back as the step, instruction pointer and registers of each sample
+        """
+        return read_trace(bytes(self.trace))
+
+# how often each instruction ran, each backward jump was taken and each loop was skipped
+Counters = namedtuple("Counters", ["hits", "back_edges", "skipped_loops"])
+
+class Profile:
+    """
+        Where a program spent its time, recorded as trace_program runs it: how often each
+        instruction ran, the backward jumps taken, the range of values each register held,
+        the loops that were skipped, and every sample_every-th step as a binary trace
+        Without skip_loops the program runs every step, even through loops it could skip
+    """
+    def __init__(self, sample_every: int = 0, skip_loops: bool = True):
+        self.skip_loops = skip_loops
+        self.steps = 0
+        self.counters = Counters(Counter(), Counter(), Counter())
+        self.minimums: List[int] = []
+        self.maximums: List[int] = []
+        self.writer = TraceWriter(sample_every)
+
+    def wrap(self, function: Callable, ip: int, ip_register: int) -> Callable:
+        """
+            Wrap an operation for the instruction at ip so that it is recorded
+        """
+        def profiled(value1, value2, output, registers):
+            function(value1, value2, output, registers)
+            self.record(ip, registers[ip_register] + 1, registers)
+        return profiled
+
+    def record(self, ip: int, next_ip: int, registers: List[int]):
+        """
+            Record an instruction that has run
+        """
+        self.steps += 1
+        self.counters.hits[ip] += 1
+        if next_ip <= ip:
+            self.counters.back_edges[next_ip, ip] += 1
+        if self.minimums:
+            self.minimums = list(map(min, self.minimums, registers))
+            self.maximums = list(map(max, self.maximums, registers))
+        else:
+            self.minimums, self.maximums = list(registers), list(registers)
+        self.writer.write(self.steps, ip, registers)
+
+    def get_hot_instructions(self, count: int = 10) -> List[Tuple[int, int]]:
+        """
+            Get the instructions that ran the most and how often they ran
+        """
+        return self.counters.hits.most_common(count)
+
+    def __str__(self):
+        lines = [f"{self.steps} steps"]
+        lines += [f"ip {ip}: {hits} hits" for ip, hits in self.get_hot_instructions()]
+        lines += [f"jump {end} -> {start}: {count} times"
+                  for (start, end), count in self.counters.back_edges.most_common(10)]
+        lines += [f"skipped {start}-{end}: {count} times"
+                  for (start, end), count in self.counters.skipped_loops.most_common()]
+        lines += [f"r{register}: {low} to {high}"
+                  for register, (low, high) in enumerate(zip(self.minimums, self.maximums))]
+        return "\n".join(lines)
+
+def read_trace(trace: bytes) -> Iterable[Tuple[int, int, List[int]]]:
+    """
+        Read a binary trace from a profile as the step, instruction pointer and registers
+    """
+    offset = 0
+    while offset < len(trace):
+        step, ip, number_of_registers = TRACE_HEADER.unpack_from(trace, offset)
+        offset += TRACE_HEADER.size
+        registers = struct.unpack_from(f"<{number_of_registers}q", trace, offset)
+        offset += 8 * number_of_registers
+        yield step, ip, list(registers)
+
+def decode_program(instructions: Sequence[Instruction], ip_register: int,
+                   number_of_registers: int, profile: Optional[Profile]) -> Machine:
+    """
+        Decode the instructions into a Machine, and with a profile wrap its operations
+        to record each step, so running without one costs nothing
+    """
+    machine = Machine(instructions, ip_register, number_of_registers)
+    if profile is not None:
+        machine.program = [(profile.wrap(operation, ip, ip_register), value1, value2, output)
+                           for ip, (operation, value1, value2, output)
+                           in enumerate(machine.program)]
+    return machine
+
+def trace_program(instructions: Sequence[Instruction], ip_register: int, registers: List[int],
+                  breakpoints: Iterable[int] = (),
+                  profile: Optional[Profile] = None) -> Iterable[List[int]]:
+    """
+        Run a program, yielding the registers whenever it reaches a breakpoint
+        The registers are updated in place, so they hold the result once it has halted
+        Hot loops are skipped (see HotLoops) unless the profile says otherwise
+
+        The machine runs straight on between breakpoints, the starts of loops that have
+        shortcuts and (while looking for loops to skip) backward jumps that aren't hot yet
+    """
+    breakpoints = set(breakpoints)
+    machine = decode_program(instructions, ip_register, len(registers), profile)
+    # run on the caller's registers, so they are updated in place
+    machine.registers = registers
+    loops = HotLoops(instructions, ip_register)
+    skip_loops = profile is None or profile.skip_loops
+    stops = set(breakpoints)
+    ip = 0
+    while 0 <= ip < len(instructions):
+        if ip in breakpoints:
+            yield registers
+        if ip in loops.shortcuts:
+            shortcut = loops.skip(ip, registers)
+            if shortcut is not None:
+                if profile is not None:
+                    profile.counters.skipped_loops[ip, shortcut.end] += 1
+                registers[ip_register] = shortcut.end
+                ip = shortcut.end + 1
+                continue
+        last, ip = machine.run_from(ip, stops, loops.hot_jumps if skip_loops else None)
+        if ip <= last and skip_loops:
+            loops.jump(ip, last)
+            if ip in loops.shortcuts:
+                stops.add(ip)
+
+def run_program(instructions: Sequence[Instruction], ip_register: int,
+                registers: Sequence[int], profile: Optional[Profile] = None) -> List[int]:
+    """
+        Run a program until it halts and get the registers
+    """
+    result = list(registers)
+    for _ in trace_program(instructions, ip_register, result, profile=profile):
+        pass
+    return result
+
+def get_compared_values(instructions: Sequence[Instruction], ip_register: int,
+                        register: int, registers: Sequence[int]) -> Iterable[int]:
+    """
+        Get the values a register is checked for equality against, in order, until they repeat
+        (for a program that halts once a register that it never changes matches something)
+    """
+    comparison = next(((i, a if b == register else b)
+                       for i, (opcode, a, b, _) in enumerate(instructions)
+                       if get_opcode_name(opcode) == "eqrr" and register in (a, b)), None)
+    if comparison is None:
+        raise ValueError(f"no eqrr compares register {register} with anything")
+    index, other = comparison
+    seen: Set[int] = set()
+    for state in trace_program(instructions, ip_register, list(registers), [index]):
+        if state[other] in seen:
+            return
+        seen.add(state[other])
+        yield state[other]
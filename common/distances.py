@@ -0,0 +1,142 @@
+"""
+    A module for working out manhattan distances between many points at once
+
+    Points are kept as a struct of arrays (one column per dimension), which are
+    numpy arrays when numpy is available and tuples otherwise, so that distances
+    are worked out a column at a time instead of a pair of points at a time
+"""
+from operator import sub
+from types import ModuleType
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple, Union
+
+np: Optional[ModuleType]
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+
+Radius = Union[int, Sequence[int]]
+# distances are numpy arrays when numpy is available and lists otherwise
+Distances = Union["ndarray", List[int]]
+Tile = Union["ndarray", List[List[int]]]
+
+class PointSet:
+    """
+        A set of N-dimensional points that distances can be measured against in bulk
+    """
+
+    def __init__(self, points: Iterable[Sequence[int]]):
+        self.points = [tuple(point) for point in points]
+        self.columns: Union["ndarray", List[Tuple[int, ...]]]
+        if np is None:
+            self.columns = list(zip(*self.points))
+        elif not self.points:
+            # there are no columns to work out the number of dimensions from
+            self.columns = np.zeros((0, 0), dtype=np.int64)
+        else:
+            self.columns = np.array(self.points, dtype=np.int64).reshape(len(self.points), -1).T
+
+    def __len__(self):
+        return len(self.points)
+
+    def get_distances(self, point: Sequence[int]) -> Distances:
+        """
+            Get the manhattan distance from a point to every point in the set
+        """
+        if np is None:
+            return [sum(map(abs, map(sub, p, point))) for p in self.points]
+        distances = np.zeros(len(self.points), dtype=np.int64)
+        for column, coordinate in zip(self.columns, point):
+            distances += np.abs(column - coordinate)
+        return distances
+
+    def get_indices_within(self, point: Sequence[int], radius: Radius) -> List[int]:
+        """
+            Get the indices of the points within a radius of a point (inclusive)
+            The radius can also be a sequence with a radius for each point in the set
+        """
+        distances = self.get_distances(point)
+        if np is not None:
+            return np.nonzero(distances <= np.asarray(radius))[0].tolist()
+        if isinstance(radius, int):
+            return [i for i, distance in enumerate(distances) if distance <= radius]
+        return [i for i, (distance, r) in enumerate(zip(distances, radius)) if distance <= r]
+
+    def count_within(self, point: Sequence[int], radius: Radius) -> int:
+        """
+            Count the points within a radius of a point (inclusive)
+        """
+        return len(self.get_indices_within(point, radius))
+
+    def get_distance_tiles(self, other: "PointSet",
+                           tile_size: int = 1024) -> Iterable[Tuple[int, int, Tile]]:
+        """
+            Get the distance matrix between every point in this set (rows) and every
+            point in another set (columns) a tile at a time, so memory stays bounded
+            Yields the first row and the first column of each tile, and the tile
+        """
+        for row in range(0, len(self), tile_size):
+            for column in range(0, len(other), tile_size):
+                tile: Tile
+                if np is None:
+                    points = other.points[column:column + tile_size]
+                    tile = [[sum(map(abs, map(sub, p, point))) for p in points]
+                            for point in self.points[row:row + tile_size]]
+                else:
+                    tile = np.zeros((min(tile_size, len(self) - row),
+                                     min(tile_size, len(other) - column)), dtype=np.int64)
+                    for mine, theirs in zip(self.columns, other.columns):
+                        tile += np.abs(mine[row:row + tile_size, None]
+                                       - theirs[None, column:column + tile_size])
+                yield row, column, tile
+
+    def get_summed_distances(self, other: "PointSet") -> List[int]:
+        """
+            Get the summed distance from each point in this set to every point in another
+        """
+        sums = [0] * len(self)
+        for row, _, tile in self.get_distance_tiles(other):
+            partial = map(sum, tile) if isinstance(tile, list) else tile.sum(axis=1).tolist()
+            for i, distance in enumerate(partial, row):
+                sums[i] += distance
+        return sums
+
+    def get_nearest(self, other: "PointSet") -> List[Optional[int]]:
+        """
+            Get the index of the closest point in another set for each point in this set,
+            or None if more than one point is closest
+        """
+        if not other:
+            return [None] * len(self)
+        nearest: List[Optional[int]] = []
+        for _, _, tile in self.get_distance_tiles(other, len(other)):
+            if isinstance(tile, list):
+                for distances in tile:
+                    closest = min(distances)
+                    tied = distances.count(closest) > 1
+                    nearest.append(None if tied else distances.index(closest))
+            else:
+                closest = tile.argmin(axis=1)
+                tied = (tile == tile.min(axis=1)[:, None]).sum(axis=1) > 1
+                nearest.extend(None if t else c for c, t in zip(closest.tolist(), tied.tolist()))
+        return nearest
+
+    def get_pairs_within(self, radius: int) -> Iterable[Tuple[int, int]]:
+        """
+            Get every pair of indices (i < j) of points that are within a radius of each other
+        """
+        for row, column, tile in self.get_distance_tiles(self):
+            if column + len(tile[0]) <= row:
+                continue
+            if isinstance(tile, list):
+                pairs: Iterable[Tuple[int, int]] = (
+                    (i, j) for i, distances in enumerate(tile)
+                    for j, distance in enumerate(distances) if distance <= radius)
+            else:
+                pairs = zip(*(indices.tolist() for indices in (tile <= radius).nonzero()))
+            for i, j in pairs:
+                if row + i < column + j:
+                    yield row + i, column + j
@@ -1,44 +1,128 @@
 """
     Graphs such as a DAG
 """
+import heapq
+from abc import ABC, abstractmethod
+from array import array
+from typing import Any, Callable, Dict, Generator, Iterable, List, Mapping, Set, Tuple
 
-from itertools import chain, count
-from typing import Any, Generator, Sequence, Tuple
-class Graph():
+class BreadthFirstSearch(ABC):
+    """
+        Distance queries for a graph that can list its nodes a level at a time (get_levels)
+        The distances from each origin are remembered until forget_distances is called
+    """
+    def __init__(self):
+        """
+            Constructor
+        """
+        self.distance_maps: Dict[Any, Dict[Any, int]] = {}
+
+    @abstractmethod
+    def get_levels(self, origin: Any) -> Iterable[List[Any]]:
+        """
+            Get the nodes reachable from the origin a level (distance) at a time
+        """
+
+    def forget_distances(self):
+        """
+            Forget the remembered distances (when the graph changes)
+        """
+        self.distance_maps.clear()
+
+    def get_distance_map(self, origin: Any) -> Dict[Any, int]:
+        """
+            Get the distance from the origin to every reachable node (in search order)
+        """
+        if origin not in self.distance_maps:
+            self.distance_maps[origin] = {node: distance
+                                          for distance, level in enumerate(self.get_levels(origin))
+                                          for node in level}
+        return self.distance_maps[origin]
+
+    def get_node_distances(self, origin: Any) -> Generator[Tuple[int, Any], None, None]:
+        """
+            Get a list of nodes and their distance from the origin
+        """
+        yield from ((distance, node) for node, distance in self.get_distance_map(origin).items())
+
+    def get_distance_histogram(self, origin: Any) -> List[int]:
+        """
+            Get how many nodes there are at each distance from the origin
+        """
+        histogram = [0] * (self.get_max_distance(origin) + 1)
+        for distance in self.get_distance_map(origin).values():
+            histogram[distance] += 1
+        return histogram
+
+    def get_max_distance(self, origin: Any) -> int:
+        """
+            Get the distance to the furthest node from the origin
+        """
+        # nodes are remembered in search order, so the last one is the furthest
+        return next(reversed(self.get_distance_map(origin).values()))
+
+    def count_at_least_distance(self, origin: Any, distance: int) -> int:
+        """
+            Count the nodes that are at least a distance from the origin
+        """
+        return sum(self.get_distance_histogram(origin)[distance:])
+
+class Graph(BreadthFirstSearch):
     """
         Directed Acyclic Graph utilizing adjacency lists under the hood
+        The reverse adjacency lists and the set of roots are kept up to date as well,
+        so that finding roots and removing nodes only touches the edges involved
     """
     def __init__(self):
         """
             Constructor
         """
-        self.graph = {}
+        super().__init__()
+        self.graph: Dict[Any, Set[Any]] = {}
+        self.reverse_graph: Dict[Any, Set[Any]] = {}
+        self.roots: Set[Any] = set()
 
     def add_edge(self, source, destination):
         """
             Add an edge from source to destination
         """
-        self.graph[source] = self.graph.get(source, set()) | set([destination])
-        if destination not in self.graph:
-            self.graph[destination] = set()
+        for node in (source, destination):
+            if node not in self.graph:
+                self.graph[node] = set()
+                self.reverse_graph[node] = set()
+                self.roots.add(node)
+        self.graph[source].add(destination)
+        self.reverse_graph[destination].add(source)
+        self.roots.discard(destination)
+        self.forget_distances()
 
     def remove_edge(self, source, destination):
         """
             Remove an edge from source to destination
         """
         self.graph[source].remove(destination)
+        self.reverse_graph[destination].remove(source)
+        if not self.reverse_graph[destination]:
+            self.roots.add(destination)
+        self.forget_distances()
 
     def get_nodes(self):
         """
             Get a list of nodes
         """
-        return set(chain.from_iterable((node, *edges) for node, edges in self.graph.items()))
+        return set(self.graph)
 
     def get_roots(self):
         """
             Get a list of roots
         """
-        return [n for n in self.get_nodes() if all(n not in edges for edges in self.graph.values())]
+        return list(self.roots)
+
+    def get_in_degree(self, node) -> int:
+        """
+            Get the number of edges going into the node
+        """
+        return len(self.reverse_graph[node])
 
     def __bool__(self):
         """
@@ -46,9 +130,9 @@ class Graph():
         """
         return bool(self.graph)
 
-    def get_edges(self, node) -> Sequence[Any]:
+    def get_edges(self, node) -> Set[Any]:
         """
-            Get a list of edges coming from the node
+            Get the set of edges coming from the node
         """
         return self.graph[node]
 
@@ -56,24 +140,142 @@ class Graph():
         """
             Remove a node from the graph and all the edges emanating from it
         """
-        for source, edges in self.graph.items():
-            if node in edges:
-                self.remove_edge(source, node)
+        for source in list(self.reverse_graph[node]):
+            self.remove_edge(source, node)
+        for destination in list(self.graph[node]):
+            self.remove_edge(node, destination)
         del self.graph[node]
+        del self.reverse_graph[node]
+        self.roots.discard(node)
+        self.forget_distances()
 
     def __str__(self):
         return "\n".join(f"Node: {source} Edges: {edges}" for source, edges in self.graph.items())
 
-    def get_node_distances(self, origin: Any) -> Generator[Tuple[int, Any], None, None]:
+    def freeze(self) -> "FrozenGraph":
         """
-            Get a list of nodes and their distance from the origin
+            Get a compact read-only copy of the graph
+        """
+        return FrozenGraph(self.graph)
+
+    def get_levels(self, origin: Any) -> Iterable[List[Any]]:
+        """
+            Get the nodes reachable from the origin a level (distance) at a time
+        """
+        level = [origin]
+        seen = set(level)
+        while level:
+            yield level
+            next_level = []
+            for node in level:
+                for destination in self.graph[node]:
+                    if destination not in seen:
+                        seen.add(destination)
+                        next_level.append(destination)
+            level = next_level
+
+    def get_topological_order(self, priority: Callable[[Any], Any] = lambda node: node):
+        """
+            Get the nodes in topological order (Kahn's algorithm), without changing the graph
+            Whenever more than one node is ready, the one with the lowest priority goes first
+            Raises a ValueError once the order runs out if the graph has a cycle
+        """
+        in_degrees = {node: len(sources) for node, sources in self.reverse_graph.items()}
+        ready = [(priority(node), node) for node in self.roots]
+        heapq.heapify(ready)
+        ordered = 0
+        while ready:
+            _, node = heapq.heappop(ready)
+            yield node
+            ordered += 1
+            for destination in self.graph[node]:
+                in_degrees[destination] -= 1
+                if not in_degrees[destination]:
+                    heapq.heappush(ready, (priority(destination), destination))
+        if ordered < len(in_degrees):
+            raise ValueError(f"the graph has a cycle ({len(in_degrees) - ordered} nodes unordered)")
+
+class FrozenGraph(BreadthFirstSearch):
+    """
+        A read-only graph in compressed sparse row form
+        Nodes are numbered in insertion order (nodes[number] and node_ids[node]), and the
+        edges from the node numbered n go to targets[offsets[n]:offsets[n + 1]]
+    """
+    def __init__(self, graph: Mapping[Any, Iterable[Any]]):
+        """
+            Constructor
+        """
+        super().__init__()
+        self.nodes: List[Any] = list(graph)
+        self.node_ids = {node: number for number, node in enumerate(self.nodes)}
+        self.offsets = array("q", [0])
+        self.targets = array("q")
+        for node in self.nodes:
+            self.targets.extend(self.node_ids[destination] for destination in graph[node])
+            self.offsets.append(len(self.targets))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get_nodes(self):
+        """
+            Get a list of nodes
+        """
+        return set(self.nodes)
+
+    def get_edges(self, node) -> List[Any]:
+        """
+            Get a list of edges coming from the node
+        """
+        number = self.node_ids[node]
+        return [self.nodes[t] for t in self.targets[self.offsets[number]:self.offsets[number + 1]]]
+
+    def get_numbered_levels(self, origin: int) -> Iterable[List[int]]:
+        """
+            Get the numbers of the nodes reachable from the numbered origin a level at a time
+        """
+        offsets, targets = self.offsets, self.targets
+        seen = bytearray(len(self.nodes))
+        seen[origin] = 1
+        level = [origin]
+        while level:
+            yield level
+            next_level = []
+            for number in level:
+                for target in targets[offsets[number]:offsets[number + 1]]:
+                    if not seen[target]:
+                        seen[target] = 1
+                        next_level.append(target)
+            level = next_level
+
+    def get_levels(self, origin: Any) -> Iterable[List[Any]]:
+        """
+            Get the nodes reachable from the origin a level (distance) at a time
+        """
+        nodes = self.nodes
+        for level in self.get_numbered_levels(self.node_ids[origin]):
+            yield [nodes[number] for number in level]
+
+    def get_topological_order(self, priority: Callable[[Any], Any] = lambda node: node):
+        """
+            Get the nodes in topological order (Kahn's algorithm)
+            Whenever more than one node is ready, the one with the lowest priority goes first
+            Raises a ValueError once the order runs out if the graph has a cycle
         """
-        queue = set([origin])
-        seen = set([origin])
-        for counter in count():
-            yield from ((counter, n) for n in queue)
-            edges = chain.from_iterable(self.get_edges(n) for n in queue)
-            queue = set(n for n in edges if n not in seen)
-            seen = seen | queue
-            if not queue:
-                break
+        offsets, targets, nodes = self.offsets, self.targets, self.nodes
+        in_degrees = array("q", [0]) * len(nodes)
+        for target in targets:
+            in_degrees[target] += 1
+        ready = [(priority(nodes[n]), n) for n in range(len(nodes)) if not in_degrees[n]]
+        heapq.heapify(ready)
+        ordered = 0
+        while ready:
+            _, number = heapq.heappop(ready)
+            yield nodes[number]
+            ordered += 1
+            for target in targets[offsets[number]:offsets[number + 1]]:
+                in_degrees[target] -= 1
+                if not in_degrees[target]:
+                    heapq.heappush(ready, (priority(nodes[target]), target))
+        if ordered < len(nodes):
+            raise ValueError(f"the graph has a cycle ({len(nodes) - ordered} nodes unordered)")
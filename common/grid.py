@@ -3,13 +3,26 @@
 """
 # we don't want to change x, y names because those are actually good names
 # pylint: disable=invalid-name
+from array import array
 from collections import abc, namedtuple
-from itertools import product
-from typing import Any, Callable, Iterable, List, Sequence, Tuple, Union
+from itertools import chain, count, product
+from typing import (AbstractSet, Any, Callable, Dict, Iterable, List, Mapping, MutableSequence,
+                    Optional, Sequence, Set, Tuple, Union)
 
 Point = namedtuple("Point", ["x", "y"])
 NestedPoints = List[Tuple[Point, Any]]
 
+# typecode for a DenseGrid that stores single characters in a bytearray
+CHARACTERS = "c"
+
+Cells = Union[bytearray, "array[Any]", List[Any]]
+
+def is_character(value: Any) -> bool:
+    """
+        Return if the value can be stored in a CHARACTERS grid (a single latin-1 character)
+    """
+    return isinstance(value, str) and len(value) == 1 and ord(value) < 256
+
 def to_point(point_str: str):
     """
         Convert a string to a x,y point
@@ -61,10 +74,34 @@ def to_below(point: Point) -> Point:
     """
     return Point(point.x, point.y + 1)
 
+# Points can also be packed into a single int (y * STRIDE + x) for hot loops, which
+# is cheaper to hash and move than a namedtuple (as long as abs(x) < STRIDE // 2)
+STRIDE = 1 << 20
+
+def to_packed(point: Point) -> int:
+    """
+        Pack a point into a single int
+    """
+    return point.y * STRIDE + point.x
+
+def from_packed(packed: int) -> Point:
+    """
+        Unpack an int back into a point
+    """
+    y = (packed + STRIDE // 2) // STRIDE
+    return Point(packed - y * STRIDE, y)
+
+def get_packed_orthogonally_adjacent(packed: int) -> List[int]:
+    """
+        Get the 4 orthogonally adjacent packed points (same order as get_orthogonally_adjacent)
+    """
+    return [packed - STRIDE, packed - 1, packed + 1, packed + STRIDE]
+
 class Grid(abc.MutableMapping):
     """
         A grid that you can set and get points from
     """
+    # pylint: disable=too-many-instance-attributes
 
     def __init__(self, *, top, left, bottom, right, fill_function=lambda _: None):
         self.top = top
@@ -74,6 +111,9 @@ class Grid(abc.MutableMapping):
         self.default_function = lambda: None
         points = product(range(left, right + 1), range(top, bottom + 1))
         self.all_points_in_rectangle = {Point(x, y): fill_function(Point(x, y)) for x, y in points}
+        self.rendered_rows: Dict[int, str] = {}
+        self.summed_area_tables: Dict[Any, SummedAreaTable] = {}
+        self.fingerprint: Optional[int] = None
 
     def __iter__(self):
         return iter(self.all_points_in_rectangle)
@@ -85,6 +125,9 @@ class Grid(abc.MutableMapping):
         return self.all_points_in_rectangle[key]
 
     def __setitem__(self, key: Point, value):
+        # a wider grid means every rendered row is out of date, not just this one
+        if not self.left <= key.x <= self.right:
+            self.rendered_rows.clear()
         if key.x >= self.right:
             self.right = key.x
         if key.x <= self.left:
@@ -93,11 +136,35 @@ class Grid(abc.MutableMapping):
             self.bottom = key.y
         if key.y <= self.top:
             self.top = key.y
+        if self.fingerprint is not None:
+            if key in self.all_points_in_rectangle:
+                self.fingerprint ^= hash((key, self.all_points_in_rectangle[key]))
+            self.fingerprint ^= hash((key, value))
         self.all_points_in_rectangle[key] = value
+        self.changed(key)
 
     def __delitem__(self, key: Point):
         self.all_points_in_rectangle = None
 
+    def changed(self, key: Point):
+        """
+            Forget anything worked out from the old value of a point
+        """
+        self.rendered_rows.pop(key.y, None)
+        self.summed_area_tables.clear()
+
+    def get_fingerprint(self) -> int:
+        """
+            Get a hash of every point and its value
+            It is worked out once and then kept up to date as points are set
+            (Zobrist style), so comparing the states of a simulation is cheap
+        """
+        if self.fingerprint is None:
+            self.fingerprint = 0
+            for point, value in self.items():
+                self.fingerprint ^= hash((point, value))
+        return self.fingerprint
+
     def is_on_boundary(self, point: Point) -> bool:
         """
             Return if the point is on the boundary
@@ -108,18 +175,44 @@ class Grid(abc.MutableMapping):
         """
             Get all the points on a boundary
         """
-        return filter(self.is_on_boundary, self.all_points_in_rectangle)
+        return filter(self.is_on_boundary, self)
 
     def __str__(self):
         """
             Print the string
         """
-        output = ""
-        for pos_y in range(self.top, self.bottom + 1):
-            for pos_x in range(self.left, self.right + 1):
-                output += str(self.all_points_in_rectangle[Point(pos_x, pos_y)])
-            output += "\n"
-        return output
+        return self.render()
+
+    def draw_row(self, y: int, left: int, right: int) -> str:
+        """
+            Draw the cells of a row from left to right (inclusive)
+        """
+        return "".join(str(self[Point(x, y)]) for x in range(left, right + 1))
+
+    def render_row(self, y: int) -> str:
+        """
+            Get a whole row as a string, drawing it only if it changed since last time
+        """
+        row = self.rendered_rows.get(y)
+        if row is None:
+            row = self.rendered_rows[y] = self.draw_row(y, self.left, self.right)
+        return row
+
+    def render(self, top_left: Optional[Point] = None,
+               bottom_right: Optional[Point] = None) -> str:
+        """
+            Render the rectangle between top_left and bottom_right (clipped to the grid)
+            Renders the whole grid if no corners are given
+        """
+        left = self.left if top_left is None else max(self.left, top_left.x)
+        top = self.top if top_left is None else max(self.top, top_left.y)
+        right = self.right if bottom_right is None else min(self.right, bottom_right.x)
+        bottom = self.bottom if bottom_right is None else min(self.bottom, bottom_right.y)
+        if (left, right) == (self.left, self.right):
+            rows = (self.render_row(y) for y in range(top, bottom + 1))
+        else:
+            rows = (self.draw_row(y, left, right) for y in range(top, bottom + 1))
+        return "".join(row + "\n" for row in rows)
 
     def get_matching_points(self, func: Callable[[Point, Any], bool]) -> List[Tuple[Point, Any]]:
         """
@@ -129,42 +222,534 @@ class Grid(abc.MutableMapping):
 
     def get_bounded_points(self, top_left: Point, bottom_right: Point) -> List[Tuple[Point, Any]]:
         """
-            Return a list of points in a sub-rectangle
+            Return a list of points in a sub-rectangle (only looking at points inside it)
+        """
+        left = top_left.x if self.left is None else max(top_left.x, self.left)
+        right = bottom_right.x if self.right is None else min(bottom_right.x, self.right)
+        top = top_left.y if self.top is None else max(top_left.y, self.top)
+        bottom = bottom_right.y if self.bottom is None else min(bottom_right.y, self.bottom)
+        points = (Point(x, y) for x in range(left, right + 1) for y in range(top, bottom + 1))
+        return [(p, self[p]) for p in points if p in self]
+
+    def get_neighbours(self, point: Point, diagonal=False) -> Sequence[Point]:
         """
-        def in_rectangle(point: Point, _) -> bool:
-            return (point.x >= top_left.x and point.x <= bottom_right.x
-                    and point.y >= top_left.y and point.y <= bottom_right.y)
-        return self.get_matching_points(in_rectangle)
+            Get the orthogonal (and diagonal, if asked) neighbours that are in the grid
+        """
+        adjacent = get_all_adjacent(point) if diagonal else get_orthogonally_adjacent(point)
+        return [p for p in adjacent if p in self]
+
+    def get_summed_area_table(self, value_function=lambda _point, value: value,
+                              top_left: Optional[Point] = None,
+                              bottom_right: Optional[Point] = None):
+        """
+            Get the summed area table of value_function over the grid (or a rectangle of it)
+            The table is kept until the grid changes
+        """
+        key = (value_function, top_left, bottom_right)
+        if key not in self.summed_area_tables:
+            table = SummedAreaTable(self, value_function, top_left, bottom_right)
+            self.summed_area_tables[key] = table
+        return self.summed_area_tables[key]
 
 
-def to_bounded_grid(points: Iterable[Point], fill_func=lambda _: None, padding=(0, 0)) -> Grid:
+class SummedAreaTable:
     """
-        Convert a set of point to a bounded grid
+        Running sums of value_function(point, value) over a rectangle of a grid
+        Building it looks at every cell once, after which the sum over any
+        sub-rectangle takes four lookups
+        (Return 1 or 0 from value_function to count matching cells instead)
+    """
+
+    def __init__(self, grid: Grid, value_function: Callable[[Point, Any], Any],
+                 top_left: Optional[Point] = None, bottom_right: Optional[Point] = None):
+        self.left = grid.left if top_left is None else top_left.x
+        self.top = grid.top if top_left is None else top_left.y
+        self.right = grid.right if bottom_right is None else bottom_right.x
+        self.bottom = grid.bottom if bottom_right is None else bottom_right.y
+        # there is an extra row and column of zeroes above and to the left
+        self.width = self.right - self.left + 2
+        self.sums = [0] * (self.width * (self.bottom - self.top + 2))
+        for row, y in enumerate(range(self.top, self.bottom + 1), 1):
+            above, current, running = (row - 1) * self.width, row * self.width, 0
+            for column, x in enumerate(range(self.left, self.right + 1), 1):
+                point = Point(x, y)
+                running += value_function(point, grid[point])
+                self.sums[current + column] = self.sums[above + column] + running
+
+    def get_sum(self, top_left: Point, bottom_right: Point):
+        """
+            Get the sum over the rectangle from top_left to bottom_right (inclusive)
+        """
+        left, right = max(top_left.x, self.left), min(bottom_right.x, self.right)
+        top, bottom = max(top_left.y, self.top), min(bottom_right.y, self.bottom)
+        if left > right or top > bottom:
+            return 0
+        x1, x2 = left - self.left, right - self.left + 1
+        y1, y2 = (top - self.top) * self.width, (bottom - self.top + 1) * self.width
+        sums = self.sums
+        return sums[y2 + x2] - sums[y1 + x2] - sums[y2 + x1] + sums[y1 + x1]
+
+    def get_window_sums(self, width: int, height: int) -> Iterable[Tuple[Point, Any]]:
+        """
+            Get the sum of every width x height window that fits in the table,
+            keyed by the top left of the window
+        """
+        sums, stride = self.sums, self.width
+        for y in range(self.top, self.bottom - height + 2):
+            y1 = (y - self.top) * stride
+            y2 = y1 + height * stride
+            for x in range(self.left, self.right - width + 2):
+                x1 = x - self.left
+                x2 = x1 + width
+                yield Point(x, y), sums[y2 + x2] - sums[y1 + x2] - sums[y2 + x1] + sums[y1 + x1]
+
+
+class DenseGrid(Grid):
+    """
+        A grid that stores every point in its rectangle in a flat, row-major array
+        Characters (typecode CHARACTERS) are kept in a bytearray, numbers in an
+        array.array of the given typecode and anything else in a list
+
+        Points inside the rectangle always have a value; setting a point outside
+        grows the rectangle and fills the new cells with `fill`
+
+        A CHARACTERS grid switches to a list as soon as it is given anything that is not
+        a single latin-1 character (including a fill of None)
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, *, top, left, bottom, right, fill=None, typecode=None,
+                 rows: Optional[Iterable[Sequence[Any]]] = None):
+        # the dictionary the base class builds is exactly what we are replacing
+        # pylint: disable=super-init-not-called,too-many-arguments
+        self.top = top
+        self.bottom = bottom
+        self.left = left
+        self.right = right
+        self.fill = fill
+        self.typecode = None if typecode == CHARACTERS and not is_character(fill) else typecode
+        self.width = right - left + 1
+        self.rendered_rows = {}
+        self.summed_area_tables = {}
+        self.fingerprint = None
+        self.neighbour_tables: Dict[bool, "array[int]"] = {}
+        height = bottom - top + 1
+        self.cells: MutableSequence[Any]
+        if rows is None:
+            self.cells = self.to_cells([fill]) * (self.width * height)
+        else:
+            self.cells = self.to_cells(chain.from_iterable(rows))
+        assert len(self.cells) == self.width * height, "Rows do not fill the rectangle"
+
+    def to_cells(self, values: Iterable[Any]) -> Cells:
+        """
+            Convert values into the underlying storage for this grid's typecode
+        """
+        if self.typecode == CHARACTERS:
+            values = list(values)
+            if all(map(is_character, values)):
+                return bytearray("".join(values), "latin-1")
+            self.typecode = None
+        if self.typecode is not None:
+            return array(self.typecode, values)
+        return list(values)
+
+    def get_offset(self, key: Point) -> int:
+        """
+            Get the offset of the point in the underlying storage
+        """
+        x, y = key
+        if self.left <= x <= self.right and self.top <= y <= self.bottom:
+            return (y - self.top) * self.width + x - self.left
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (Point(x, y) for x in range(self.left, self.right + 1)
+                for y in range(self.top, self.bottom + 1))
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, key):
+        try:
+            x, y = key
+        except (TypeError, ValueError):
+            return False
+        return self.left <= x <= self.right and self.top <= y <= self.bottom
+
+    def __getitem__(self, key: Point):
+        if self.typecode == CHARACTERS:
+            return chr(self.cells[self.get_offset(key)])
+        return self.cells[self.get_offset(key)]
+
+    def __setitem__(self, key: Point, value):
+        if key not in self:
+            self.grow(key)
+        offset = self.get_offset(key)
+        if self.typecode == CHARACTERS and not is_character(value):
+            # the bytearray can't hold this, so keep every cell in a list from now on
+            self.cells = list(bytes(self.cells).decode("latin-1"))
+            self.typecode = None
+        cell = ord(value) if self.typecode == CHARACTERS else value
+        if self.cells[offset] != cell:
+            if self.fingerprint is not None:
+                self.fingerprint ^= hash((key, self[key])) ^ hash((key, value))
+            self.cells[offset] = cell
+            self.changed(key)
+
+    def __delitem__(self, key: Point):
+        self[key] = self.fill
+
+    def grow(self, point: Point):
+        """
+            Grow the rectangle so that it contains the point
+            Existing rows are copied over a slice at a time
+        """
+        old_cells, old_width, old_top, old_left = self.cells, self.width, self.top, self.left
+        self.top, self.bottom = min(self.top, point.y), max(self.bottom, point.y)
+        self.left, self.right = min(self.left, point.x), max(self.right, point.x)
+        self.width = self.right - self.left + 1
+        self.rendered_rows.clear()
+        self.neighbour_tables.clear()
+        self.fingerprint = None
+        self.cells = self.to_cells([self.fill]) * (self.width * (self.bottom - self.top + 1))
+        for row in range(len(old_cells) // old_width):
+            start = (row + old_top - self.top) * self.width + old_left - self.left
+            self.cells[start:start + old_width] = old_cells[row * old_width:(row + 1) * old_width]
+
+    def get_neighbours(self, point: Point, diagonal=False) -> Sequence[Point]:
+        """
+            Get the orthogonal (and diagonal, if asked) neighbours that are in the grid
+            The neighbours of every point are worked out once and kept until the grid grows
+        """
+        if point not in self:
+            return super().get_neighbours(point, diagonal)
+        neighbours = self.get_neighbour_offsets(self.get_offset(point), diagonal)
+        return [self.get_point(offset) for offset in neighbours if offset >= 0]
+
+    def get_neighbour_offsets(self, offset: int, diagonal: bool = False) -> "array[int]":
+        """
+            Get the offsets of the neighbours of the cell at an offset straight from the
+            neighbour table (see get_neighbour_table), with -1 for each one off the grid
+        """
+        slots = 8 if diagonal else 4
+        return self.get_neighbour_table(diagonal)[offset * slots:(offset + 1) * slots]
+
+    def get_cell(self, offset: int) -> Any:
+        """
+            Get the value of the cell at an offset in the underlying storage
+        """
+        return chr(self.cells[offset]) if self.typecode == CHARACTERS else self.cells[offset]
+
+    def get_point(self, offset: int) -> Point:
+        """
+            Get the point at an offset in the underlying storage
+        """
+        y, x = divmod(offset, self.width)
+        return Point(x + self.left, y + self.top)
+
+    def get_neighbour_table(self, diagonal: bool = False) -> "array[int]":
+        """
+            Get the offsets of the neighbours of every point, in the same order as the cells
+            Each point has a slot for every adjacent point (4, or 8 with diagonals), which
+            is -1 if it is off the grid
+        """
+        table = self.neighbour_tables.get(diagonal)
+        if table is None:
+            adjacent = get_all_adjacent if diagonal else get_orthogonally_adjacent
+            points = (Point(x, y) for y in range(self.top, self.bottom + 1)
+                      for x in range(self.left, self.right + 1))
+            table = self.neighbour_tables[diagonal] = array("i")
+            for point in points:
+                table.extend(self.get_offset(p) if p in self else -1 for p in adjacent(point))
+        return table
+
+    def get_distance_field(self, sources: Iterable[Point], obstacles: Iterable[Any],
+                           targets: AbstractSet[Point] = frozenset(),
+                           max_distance: Optional[int] = None) -> Mapping[Point, int]:
+        """
+            Breadth first search from every source at once (see TextGrid.get_distance_field)
+            The search runs over offsets and the neighbour table, and the distances are
+            handed back keyed by offset behind a mapping that takes points
+        """
+        table, cells = self.get_neighbour_table(), self.cells
+        if self.typecode == CHARACTERS:
+            obstacles = [ord(obstacle) for obstacle in obstacles if is_character(obstacle)]
+        blocked = set(obstacles)
+        target_offsets = {self.get_offset(target) for target in targets if target in self}
+        distances = {self.get_offset(source): 0 for source in sources}
+        frontier = list(distances)
+        for distance in count(1):
+            if (not frontier or not target_offsets.isdisjoint(frontier)
+                    or distance - 1 == max_distance):
+                break
+            next_frontier = []
+            for last in frontier:
+                for neighbour in table[4 * last:4 * last + 4]:
+                    if neighbour >= 0 and neighbour not in distances \
+                            and cells[neighbour] not in blocked:
+                        distances[neighbour] = distance
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        return OffsetMapping(self, distances)
+
+    def get_row(self, y: int, left: Optional[int] = None,
+                right: Optional[int] = None) -> Sequence[Any]:
+        """
+            Get a slice of the values in a row (the whole row by default)
+        """
+        left = self.left if left is None else left
+        right = self.right if right is None else right
+        start = self.get_offset(Point(left, y))
+        row = self.cells[start:start + right - left + 1]
+        return row.decode("latin-1") if isinstance(row, bytearray) else row
+
+    def draw_row(self, y: int, left: int, right: int) -> str:
+        """
+            Draw the cells of a row from left to right (inclusive)
+        """
+        row = self.get_row(y, left, right)
+        return row if isinstance(row, str) else "".join(map(str, row))
+
+    def get_matching_points(self, func: Callable[[Point, Any], bool]) -> List[Tuple[Point, Any]]:
+        """
+            Get all points matching a function
+        """
+        decode = chr if self.typecode == CHARACTERS else (lambda value: value)
+        cells, width = self.cells, self.width
+        matches = []
+        ys = range(self.top, self.bottom + 1)
+        for column, x in enumerate(range(self.left, self.right + 1)):
+            for offset, y in zip(range(column, len(cells), width), ys):
+                point, value = Point(x, y), decode(cells[offset])
+                if func(point, value):
+                    matches.append((point, value))
+        return matches
+
+
+class OffsetMapping(abc.Mapping):
+    """
+        A read-only mapping from points to values that is kept keyed by offsets into a
+        DenseGrid, which saves making a point for every key up front
+        The grid's rectangle is copied, so the mapping stays valid if the grid grows
+    """
+
+    def __init__(self, grid: DenseGrid, by_offset: Dict[int, Any]):
+        self.top, self.left, self.width = grid.top, grid.left, grid.width
+        self.height = grid.bottom - grid.top + 1
+        self.by_offset = by_offset
+
+    def get_offset(self, point: Point) -> Optional[int]:
+        """
+            Get the offset of the point (or None if it is outside the rectangle)
+        """
+        try:
+            x, y = point[0] - self.left, point[1] - self.top
+        except (TypeError, IndexError):
+            return None
+        return y * self.width + x if 0 <= x < self.width and 0 <= y < self.height else None
+
+    def __getitem__(self, key: Point):
+        offset = self.get_offset(key)
+        if offset is None or offset not in self.by_offset:
+            raise KeyError(key)
+        return self.by_offset[offset]
+
+    def __contains__(self, key):
+        offset = self.get_offset(key)
+        return offset is not None and offset in self.by_offset
+
+    def __iter__(self):
+        for offset in self.by_offset:
+            y, x = divmod(offset, self.width)
+            yield Point(x + self.left, y + self.top)
+
+    def __len__(self):
+        return len(self.by_offset)
+
+
+class PendingEvaluation(Exception):
+    """
+        Raised inside a LazyGrid fill function when it looks up a point that
+        has not been evaluated yet, so the grid can evaluate that point first
+    """
+    def __init__(self, point: Point):
+        super().__init__(point)
+        self.point = point
+
+
+class LazyGrid(Grid):
+    """
+        A grid that calls fill_function for a point the first time it is looked up
+        and remembers the value
+
+        The fill function may look up other points of the same grid (such as a recurrence)
+        Those lookups are evaluated with an explicit stack instead of recursion, which
+        means the fill function may be called more than once for a point and must not
+        have side effects
+
+        A bound of None means the grid is unbounded in that direction
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, *, top=None, left=None, bottom=None, right=None,
+                 fill_function=lambda _: None):
+        # the base class would evaluate every point up front, which is what we are avoiding
+        # pylint: disable=super-init-not-called
+        self.top = top
+        self.bottom = bottom
+        self.left = left
+        self.right = right
+        self.fill_function = fill_function
+        self.all_points_in_rectangle: Dict[Point, Any] = {}
+        self.rendered_rows = {}
+        self.summed_area_tables = {}
+        self.fingerprint = None
+        self.pending: List[Point] = []
+        self.pending_points: Set[Point] = set()
+
+    def is_bounded(self) -> bool:
+        """
+            Return if the grid has all four bounds
+        """
+        return None not in (self.top, self.bottom, self.left, self.right)
+
+    def __contains__(self, key):
+        try:
+            x, y = key
+        except (TypeError, ValueError):
+            return False
+        return ((self.left is None or x >= self.left)
+                and (self.right is None or x <= self.right)
+                and (self.top is None or y >= self.top)
+                and (self.bottom is None or y <= self.bottom))
+
+    def __iter__(self):
+        if not self.is_bounded():
+            raise TypeError("Cannot iterate over an unbounded grid")
+        return (Point(x, y) for x in range(self.left, self.right + 1)
+                for y in range(self.top, self.bottom + 1))
+
+    def __len__(self):
+        if not self.is_bounded():
+            raise TypeError("An unbounded grid has no length")
+        return (self.right - self.left + 1) * (self.bottom - self.top + 1)
+
+    def __getitem__(self, key: Point):
+        try:
+            return self.all_points_in_rectangle[key]
+        except KeyError:
+            pass
+        if key not in self:
+            raise KeyError(key)
+        if self.pending:
+            # we are inside a fill function, so let evaluate work out this point first
+            raise PendingEvaluation(key)
+        return self.evaluate(key)
+
+    def evaluate(self, key: Point):
+        """
+            Evaluate a point and everything it depends on
+        """
+        self.pending.append(key)
+        self.pending_points.add(key)
+        try:
+            while self.pending:
+                point = self.pending[-1]
+                try:
+                    value = self.fill_function(point)
+                except PendingEvaluation as dependency:
+                    if dependency.point in self.pending_points:
+                        raise ValueError(f"{dependency.point} depends on itself") from None
+                    self.pending.append(dependency.point)
+                    self.pending_points.add(dependency.point)
+                    continue
+                self.all_points_in_rectangle[point] = value
+                self.pending_points.remove(self.pending.pop())
+        finally:
+            self.pending.clear()
+            self.pending_points.clear()
+        return self.all_points_in_rectangle[key]
+
+    def __setitem__(self, key: Point, value):
+        if key not in self:
+            self.rendered_rows.clear()
+        if self.right is not None and key.x > self.right:
+            self.right = key.x
+        if self.left is not None and key.x < self.left:
+            self.left = key.x
+        if self.bottom is not None and key.y > self.bottom:
+            self.bottom = key.y
+        if self.top is not None and key.y < self.top:
+            self.top = key.y
+        # a point that was never evaluated has no old value to take out of the fingerprint
+        self.fingerprint = None
+        self.all_points_in_rectangle[key] = value
+        self.changed(key)
+
+    def __delitem__(self, key: Point):
+        """
+            Forget the value so that it is evaluated again on the next lookup
+        """
+        self.all_points_in_rectangle.pop(key, None)
+        self.fingerprint = None
+        self.changed(key)
+
+    def get_matching_points(self, func: Callable[[Point, Any], bool]) -> List[Tuple[Point, Any]]:
+        """
+            Get all points matching a function (this evaluates every point)
+        """
+        return [(p, v) for p, v in ((p, self[p]) for p in self) if func(p, v)]
+
+
+def render_points(points: Iterable[Point], top_left: Point, bottom_right: Point,
+                  filled="#", empty=" ") -> str:
+    """
+        Render the rectangle between top_left and bottom_right, marking every point
+        in points with filled and everything else with empty
+    """
+    width = bottom_right.x - top_left.x + 1
+    rows = [[empty] * width for _ in range(top_left.y, bottom_right.y + 1)]
+    for point in points:
+        if top_left.x <= point.x <= bottom_right.x and top_left.y <= point.y <= bottom_right.y:
+            rows[point.y - top_left.y][point.x - top_left.x] = filled
+    return "".join("".join(row) + "\n" for row in rows)
+
+def get_bounding_rectangle(points: Iterable[Point], padding=(0, 0)) -> Dict[str, int]:
+    """
+        Get the top, bottom, left and right of the rectangle surrounding the points
     """
     xs = [p.x for p in points]
     ys = [p.y for p in points]
-    return Grid(top=min(ys) - padding[1],
-                bottom=max(ys) + padding[1],
-                left=min(xs) - padding[0],
-                right=max(xs) + padding[0],
-                fill_function=fill_func)
+    return {"top": min(ys) - padding[1], "bottom": max(ys) + padding[1],
+            "left": min(xs) - padding[0], "right": max(xs) + padding[0]}
 
-def from_strings(text: Sequence[str], default=None) -> Grid:
+def to_bounded_grid(points: Iterable[Point], fill_func=lambda _: None, padding=(0, 0)) -> Grid:
     """
-        From a row of strings create a grid
-        If the point doesn't exist, fill with default
+        Convert a set of point to a bounded grid
     """
-    top = 0
-    bottom = len(text) - 1
-    left = 0
-    right = max(len(t) for t in text) - 1
+    return Grid(fill_function=fill_func, **get_bounding_rectangle(points, padding))
 
-    def fill_function(point: Point):
-        if point.y >= len(text) or point.x >= len(text[point.y]):
-            return default
-        return text[point.y][point.x]
+def to_dense_grid(points: Iterable[Point], fill=None, typecode=None, padding=(0, 0)) -> DenseGrid:
+    """
+        Convert a set of points to a dense grid where every cell starts as fill
+    """
+    bounds = get_bounding_rectangle(points, padding)
+    return DenseGrid(top=bounds["top"], left=bounds["left"], bottom=bounds["bottom"],
+                     right=bounds["right"], fill=fill, typecode=typecode)
 
-    return Grid(top=top, bottom=bottom, left=left, right=right, fill_function=fill_function)
+def from_strings(text: Sequence[str], default=None) -> DenseGrid:
+    """
+        From a row of strings create a grid
+        If the point doesn't exist, fill with default
+    """
+    width = max(len(t) for t in text)
+    bounds = {"top": 0, "bottom": len(text) - 1, "left": 0, "right": width - 1}
+    if isinstance(default, str) and len(default) == 1:
+        rows: Iterable[Sequence[Any]] = (t.ljust(width, default) for t in text)
+        return DenseGrid(fill=default, typecode=CHARACTERS, rows=rows, **bounds)
+    rows = (list(t) + [default] * (width - len(t)) for t in text)
+    return DenseGrid(fill=default, rows=rows, **bounds)
 
 def get_orthogonally_adjacent(point: Point) -> List[Point]:
     """
@@ -185,9 +770,16 @@ class TextGrid(abc.MutableMapping):
         A text grid that represents some sort of cartographical map
     """
 
-    def __init__(self, text: Sequence[str], default: str):
+    def __init__(self, text: Sequence[str], default: str, indexed: Iterable[str] = ()):
+        """
+            Every character in indexed has its positions kept up to date as the grid changes,
+            so looking up or counting those characters doesn't need to scan the grid
+        """
         self.grid = from_strings(text, default)
         self.default = default
+        self.positions: Dict[str, Set[Point]] = {character: set() for character in indexed}
+        for point, character in self.grid.get_matching_points(lambda _, c: c in self.positions):
+            self.positions[character].add(point)
 
     def __str__(self):
         return str(self.grid)
@@ -196,15 +788,44 @@ class TextGrid(abc.MutableMapping):
         """
             Get all characters matching a point
         """
+        if not callable(matcher) and matcher in self.positions:
+            # sorting the points gives the same order as scanning the grid
+            return [(point, matcher) for point in sorted(self.positions[matcher])]
         matching_function = matcher if callable(matcher) else (lambda _p, x: x == matcher)
         return self.grid.get_matching_points(matching_function)
 
+    def count(self, character: str) -> int:
+        """
+            Count how many times a character appears in the grid
+        """
+        if character in self.positions:
+            return len(self.positions[character])
+        return len(self.get_characters(character))
+
+    def get_fingerprint(self) -> int:
+        """
+            Get a hash of the map that is kept up to date as it changes
+        """
+        return self.grid.get_fingerprint()
+
+    def get_top_left(self) -> Point:
+        """
+            Get the top left corner of the map
+        """
+        return Point(self.grid.left, self.grid.top)
+
+    def get_rows(self) -> List[str]:
+        """
+            Get every row of the map as a string, from the top down
+        """
+        return [self.grid.render_row(y) for y in range(self.grid.top, self.grid.bottom + 1)]
+
     def move(self, source: Point, destination: Point, backfill: str):
         """
             Move whatever token at source to destination, and backfill into source
         """
-        self.grid[destination] = self.grid[source]
-        self.grid[source] = backfill
+        self[destination] = self.grid[source]
+        self[source] = backfill
 
     def __iter__(self):
         return iter(self.grid)
@@ -216,10 +837,24 @@ class TextGrid(abc.MutableMapping):
         return self.grid[key]
 
     def __setitem__(self, key: Point, value):
+        if not self.positions:
+            self.grid[key] = value
+            return
+        grows = key not in self.grid
+        old_value = self.grid.get(key)
+        if old_value in self.positions:
+            self.positions[old_value].discard(key)
+        if value in self.positions:
+            self.positions[value].add(key)
         self.grid[key] = value
+        if grows and self.grid.fill in self.positions:
+            # growing filled the new cells without going through here
+            fill = self.grid.fill
+            self.positions[fill] = {p for p, _ in self.grid.get_matching_points(
+                lambda _, c: c == fill)}
 
     def __delitem__(self, key: Point):
-        self.grid[key] = self.default
+        self[key] = self.default
 
     def is_valid(self, p: Point, invalid: Sequence[str]):
         """
@@ -227,51 +862,90 @@ class TextGrid(abc.MutableMapping):
         """
         return p in self.grid and self.grid[p] not in invalid
 
+    def get_distance_field(self, sources: Iterable[Point], obstacles: Sequence[str],
+                           targets: AbstractSet[Point] = frozenset(),
+                           max_distance: Optional[int] = None) -> Mapping[Point, int]:
+        """
+            Breadth first search from every source at once and return the distance
+            from each reachable point to its closest source
+            Stops after the first level that reaches any of the targets, or after max_distance
+        """
+        sources = list(sources)
+        if all(source in self.grid for source in sources):
+            return self.grid.get_distance_field(sources, obstacles, targets, max_distance)
+        distances = {source: 0 for source in sources}
+        frontier = list(distances)
+        for distance in count(1):
+            if not frontier or any(p in targets for p in frontier) or distance - 1 == max_distance:
+                break
+            next_frontier = []
+            for last in frontier:
+                for orthogonal in self.get_neighbours(last):
+                    if orthogonal not in distances and self.grid[orthogonal] not in obstacles:
+                        distances[orthogonal] = distance
+                        next_frontier.append(orthogonal)
+            frontier = next_frontier
+        return distances
+
     def get_closest_targets(self, point: Point, targets: List[Point], obstacles: Sequence[str]):
         """
             Return a list of paths that are minimal distance to a target square
         """
-        candidates = [(point, 0)]
-        seen = set([point])
-        while candidates:
-            # See if any of our paths are targets
-            valid_paths = [candidate for candidate in candidates if candidate[0] in targets]
-            if valid_paths:
-                return valid_paths
-
-            new_paths = []
-            for last, length in candidates:
-                for orthogonal in get_orthogonally_adjacent(last):
-                    if orthogonal not in seen and self.is_valid(orthogonal, obstacles):
-                        new_path = (orthogonal, length + 1)
-                        seen.add(orthogonal)
-                        new_paths.append(new_path)
-
-            candidates = new_paths
-
-        return []
-
+        distances = self.get_distance_field([point], obstacles, set(targets))
+        return [(p, distances[p]) for p in dict.fromkeys(targets) if p in distances]
 
     def get_best_next_step(self, point: Point, target: Point, length: int, obstacles: str):
         """
             Get the best next step given a point and a target (and it has to be < length)
+            Searching back from the target tells us the distance from every neighbour at once
         """
         if point == target:
             return point
-        orthogonal = [p for p in get_orthogonally_adjacent(point) if self.is_valid(p, obstacles)]
-        paths = [(p, self.get_closest_targets(p, [target], obstacles)) for p in orthogonal]
-        paths = [(first, answers[0]) for first, answers in paths if answers]
-        return next(first for (first, (last, l)) in paths if l < length and last == target)
+        distances = self.get_distance_field([target], obstacles, max_distance=length - 1)
+        orthogonal = [p for p in self.get_neighbours(point) if self.grid[p] not in obstacles]
+        return next(p for p in orthogonal if distances.get(p, length) < length)
 
     def is_adjacent_to(self, point: Point, desired: str) -> bool:
         """
             Return true if the point is adjacent to a desired square
         """
-        orthogonal = get_orthogonally_adjacent(point)
-        return any(self.grid[p] == desired for p in orthogonal if self.is_valid(p, []))
+        grid = self.grid
+        if point not in grid:
+            return any(grid[p] == desired for p in grid.get_neighbours(point))
+        return any(offset >= 0 and grid.get_cell(offset) == desired
+                   for offset in grid.get_neighbour_offsets(grid.get_offset(point)))
+
+    def get_adjacent(self, point: Point, desired: str) -> List[Point]:
+        """
+            Get the orthogonally adjacent points that hold a desired character
+            (only the matching neighbours are turned back into points)
+        """
+        grid = self.grid
+        if point not in grid:
+            return [p for p in grid.get_neighbours(point) if grid[p] == desired]
+        return [grid.get_point(offset)
+                for offset in grid.get_neighbour_offsets(grid.get_offset(point))
+                if offset >= 0 and grid.get_cell(offset) == desired]
+
+    def get_neighbours(self, point: Point, diagonal=False) -> Sequence[Point]:
+        """
+            Get the orthogonal (and diagonal, if asked) neighbours that are on the map
+        """
+        return self.grid.get_neighbours(point, diagonal)
 
     def get_surrounding(self, point: Point) -> Sequence[Tuple[Point, str]]:
         """
             Get the surrounding points
         """
-        return [(point, self.grid[point]) for point in get_all_adjacent(point) if point in self]
+        return [(p, self.grid[p]) for p in self.grid.get_neighbours(point, diagonal=True)]
+
+    def get_surrounding_characters(self, point: Point) -> List[str]:
+        """
+            Get the characters of the surrounding points (without working out the points)
+        """
+        grid = self.grid
+        if point not in grid:
+            return [character for _, character in self.get_surrounding(point)]
+        return [grid.get_cell(offset)
+                for offset in grid.get_neighbour_offsets(grid.get_offset(point), diagonal=True)
+                if offset >= 0]
@@ -1,13 +1,65 @@
 """
     A collection of methods to parse input files for Advent of Code puzzles
 """
-from typing import List
+from array import array
+from collections import namedtuple
+from functools import partial
+import hashlib
+import inspect
+from itertools import islice
+import os
+import pickle
+import re
+import sys
+from string import Formatter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# parsed inputs are cached here (see read_parsed_input)
+CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               ".input_cache")
+# bump this to throw away every cached input
+CACHE_VERSION = 1
+INTEGER = re.compile(r"-?\d+")
+
+# the pattern and conversion for each type of field in a LineFormat
+FieldType = Tuple[str, Callable[[str], Any]]
+FIELD_TYPES: Dict[str, FieldType] = {
+    "int": (r"[ \t]*[-+]?\d+", int),
+    "word": (r"\w+", str),
+    "str": (r".*?", str)
+}
+# records are namedtuples made up at runtime from a LineFormat's fields
+Record = Any
 
 def read_numbers(input_filename: str) -> List[int]:
     """
-        Read a file and return a list of numbers
+        Read a file and return a list of numbers (one on each non-blank line)
+    """
+    return [int(line) for line in iterate_strings(input_filename) if line.strip()]
+
+def read_integers(input_filename: str) -> array:
+    """
+        Read every (signed) integer in a file, in order, into a flat array
+    """
+    with open(input_filename, encoding="utf-8") as input_file:
+        return extract_integers(input_file.read())
+
+def extract_integers(text: str) -> array:
+    """
+        Get every (signed) integer in some text, in order, as a flat array
+        Anything that isn't part of a number is skipped
+    """
+    return array("q", map(int, INTEGER.findall(text)))
+
+def read_integer_records(input_filename: str, columns: int) -> List[Tuple[int, ...]]:
+    """
+        Read every integer in a file and group them into records of a fixed number of columns
+        (such as a file with a position and a velocity on each line)
     """
-    return get_transformed_input(input_filename, int)
+    integers = read_integers(input_filename)
+    if len(integers) % columns:
+        raise ValueError(f"{len(integers)} integers do not fit in {columns} columns")
+    return list(zip(*[iter(integers)] * columns))
 
 def read_strings(input_filename: str) -> List[str]:
     """
@@ -15,17 +67,209 @@ def read_strings(input_filename: str) -> List[str]:
     """
     return get_transformed_input(input_filename, str)
 
-def get_transformed_input(input_filename: str, transform_function):
+def get_transformed_input(input_filename: str, transform_function, cache=False):
     """
         Read all the lines of a file and transform it according to
-        transform_function
+        transform_function (cached on disk if asked, see read_parsed_input)
+    """
+    if cache:
+        return read_parsed_input(input_filename, partial(transform_lines, transform_function))
+    return list(iterate_transformed_input(input_filename, transform_function))
+
+def transform_lines(transform_function, lines: Sequence[str]) -> List[Any]:
+    """
+        Transform every line according to transform_function
     """
-    with open(input_filename) as input_file:
-        return [transform_function(line.rstrip()) for line in input_file]
+    return [transform_function(line) for line in lines]
+
+def read_parsed_input(input_filename: str, parse_function: Callable[[List[str]], Any]):
+    """
+        Read all the lines of a file and parse them all at once with parse_function
+
+        The result is pickled in CACHE_DIRECTORY, keyed by the file's path and contents,
+        by the parse function and the source of the module it is defined in (which takes
+        in the helpers next to it), by the source of this module and by CACHE_VERSION,
+        so it is only parsed again when one of those changes
+        (bump CACHE_VERSION when a helper from anywhere else changes what gets parsed)
+
+        If the result can't be pickled it is returned without being cached
+    """
+    with open(input_filename, "rb") as input_file:
+        contents = input_file.read()
+    key = hashlib.sha256()
+    key.update(os.path.abspath(input_filename).encode())
+    key.update(hashlib.sha256(contents).digest())
+    key.update(f"{CACHE_VERSION}:{get_module_source(__name__)}".encode())
+    key.update(get_transform_identity(parse_function).encode())
+    cache_filename = os.path.join(CACHE_DIRECTORY, key.hexdigest() + ".pickle")
+    try:
+        with open(cache_filename, "rb") as cache_file:
+            return pickle.load(cache_file)
+    except (OSError, EOFError, AttributeError, ImportError, pickle.UnpicklingError):
+        pass
+    parsed = parse_function([line.rstrip() for line in contents.decode().splitlines()])
+    os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+    # write to the side and then move, so nothing ever reads half a cache file
+    temporary_filename = f"{cache_filename}.{os.getpid()}"
+    try:
+        with open(temporary_filename, "wb") as cache_file:
+            pickle.dump(parsed, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_filename, cache_filename)
+    except (OSError, AttributeError, TypeError, pickle.PicklingError):
+        # not being able to cache the result is no reason not to return it
+        pass
+    finally:
+        if os.path.exists(temporary_filename):
+            os.remove(temporary_filename)
+    return parsed
+
+def get_transform_identity(transform_function) -> str:
+    """
+        Identify a transform function by its name and the source code of its module
+    """
+    if isinstance(transform_function, partial):
+        arguments = [get_transform_identity(a) for a in transform_function.args]
+        return ",".join([get_transform_identity(transform_function.func), *arguments])
+    module = getattr(transform_function, "__module__", "")
+    name = getattr(transform_function, "__qualname__", repr(transform_function))
+    return f"{module}.{name}:{get_module_source(module)}"
+
+def get_module_source(module_name: str) -> str:
+    """
+        Get the source code of a module (or "" for modules such as builtins that have none)
+    """
+    module = sys.modules.get(module_name)
+    try:
+        return inspect.getsource(module) if module is not None else ""
+    except (OSError, TypeError):
+        return ""
+
+def iterate_numbers(input_filename: str) -> Iterator[int]:
+    """
+        Read a file a line at a time as numbers
+    """
+    return iterate_transformed_input(input_filename, int)
+
+def iterate_strings(input_filename: str) -> Iterator[str]:
+    """
+        Read a file a line at a time as strings
+    """
+    return iterate_transformed_input(input_filename, str)
+
+def iterate_transformed_input(input_filename: str, transform_function) -> Iterator[Any]:
+    """
+        Read a file a line at a time and transform each line according to
+        transform_function (only one line is held in memory at a time)
+    """
+    with open(input_filename, encoding="utf-8") as input_file:
+        for line in input_file:
+            yield transform_function(line.rstrip())
+
+def iterate_transformed_batches(input_filename: str,
+                                batch_function: Callable[[Sequence[str]], Any],
+                                batch_size: int = 1024) -> Iterator[Any]:
+    """
+        Read a file batch_size lines at a time and transform each batch of lines
+        according to batch_function
+    """
+    lines = iterate_strings(input_filename)
+    batch = list(islice(lines, batch_size))
+    while batch:
+        yield batch_function(batch)
+        batch = list(islice(lines, batch_size))
 
 def read_single_line(input_filename: str, transform_function=str) -> str:
     """
         Read a single line of a file and transform it according to
         transform function
     """
-    return get_transformed_input(input_filename, transform_function)[0]
+    return next(iterate_transformed_input(input_filename, transform_function))
+
+class LineFormat:
+    """
+        A line format such as "#{id:int} @ {left:int},{top:int}: {width:int}x{height:int}"
+        compiled once into a regular expression
+
+        Fields are {name:type}, where the type is a key of FIELD_TYPES (str by default)
+        or of the extra types given, and everything else has to match exactly
+        (except that ints may have spaces in front of them)
+        Each line is parsed into a namedtuple with the format's name and fields
+    """
+    def __init__(self, name: str, format_string: str, types: Optional[Dict[str, FieldType]] = None):
+        """
+            Constructor
+        """
+        types = {**FIELD_TYPES, **(types or {})}
+        self.format_string = format_string
+        self.fields: List[str] = []
+        self.converters: List[Callable[[str], Any]] = []
+        pattern = ""
+        for literal, field, field_type, _ in Formatter().parse(format_string):
+            pattern += re.escape(literal)
+            if field is not None:
+                field_pattern, converter = types[field_type or "str"]
+                pattern += f"(?P<{field}>{field_pattern})"
+                self.fields.append(field)
+                self.converters.append(converter)
+        self.regex = re.compile(pattern)
+        self.lines_regex = re.compile(f"^{pattern}$", re.MULTILINE)
+        self.record: Any = namedtuple(name, self.fields)  # type: ignore
+
+    def to_record(self, match) -> Record:
+        """
+            Convert a match of the format into a record
+        """
+        return self.record._make(convert(match.group(field))
+                                 for field, convert in zip(self.fields, self.converters))
+
+    def parse(self, line: str) -> Record:
+        """
+            Parse a single line
+        """
+        match = self.regex.fullmatch(line)
+        if match is None:
+            raise ValueError(f"{line!r} does not match {self.format_string!r}")
+        return self.to_record(match)
+
+    def parse_all(self, lines: Iterable[str]) -> List[Record]:
+        """
+            Parse every line
+        """
+        return [self.parse(line) for line in lines]
+
+    def read(self, input_filename: str) -> List[Record]:
+        """
+            Parse every (non-blank) line of a file with a single scan over the whole file
+        """
+        with open(input_filename, encoding="utf-8") as input_file:
+            text = input_file.read()
+        records = [self.to_record(match) for match in self.lines_regex.finditer(text)]
+        lines = [line for line in text.splitlines() if line.strip()]
+        if len(records) != len(lines):
+            raise ValueError(f"Only {len(records)} of the {len(lines)} lines in "
+                             f"{input_filename} match {self.format_string!r}")
+        return records
+
+    def to_columns(self, records: Sequence[Record]) -> Record:
+        """
+            Convert parsed records into one record of columns (ints are stored in arrays)
+        """
+        columns = zip(*records) if records else [()] * len(self.fields)
+        return self.record._make(array("q", column) if convert is int else list(column)
+                                 for column, convert in zip(columns, self.converters))
+
+LINE_FORMATS: Dict[str, LineFormat] = {}
+
+def register_line_format(name: str, format_string: str,
+                         types: Optional[Dict[str, FieldType]] = None) -> LineFormat:
+    """
+        Compile a line format and register it under its name
+    """
+    LINE_FORMATS[name] = LineFormat(name, format_string, types)
+    return LINE_FORMATS[name]
+
+def read_formatted_input(input_filename: str, name: str) -> List[Record]:
+    """
+        Parse every line of a file with a registered line format
+    """
+    return LINE_FORMATS[name].read(input_filename)
@@ -1,7 +1,12 @@
 """
     A list of opcodes
 """
+from array import array
 from operator import add, mul, and_, or_, gt, eq
+import re
+from typing import (AbstractSet, Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Set,
+                    Tuple, Union)
+
 def apply_to_registers(registers, output, val1, val2, func):
     """
         Apply func(val1, val2) and saves it in registers[output]
@@ -135,3 +140,330 @@ OPCODE_MAPPING = {
     "eqir": eqir,
     "eqrr": eqrr
 }
+
+# Python expressions for each kind of opcode (the first four letters of its name)
+EXPRESSIONS = {
+    "add": "{} + {}",
+    "mul": "{} * {}",
+    "ban": "{} & {}",
+    "bor": "{} | {}",
+    "set": "{}",
+    "gtir": "1 if {} > {} else 0",
+    "gtri": "1 if {} > {} else 0",
+    "gtrr": "1 if {} > {} else 0",
+    "eqir": "1 if {} == {} else 0",
+    "eqri": "1 if {} == {} else 0",
+    "eqrr": "1 if {} == {} else 0"
+}
+
+Instruction = Tuple[Union[str, Callable], int, int, int]
+
+def get_opcode_name(opcode: Union[str, Callable]) -> str:
+    """
+        Get the name of an opcode (given either its name or its function)
+    """
+    return opcode if isinstance(opcode, str) else opcode.__name__
+
+def get_operand_kinds(name: str) -> str:
+    """
+        Get whether each operand of an opcode is a register (r) or an immediate value (i)
+    """
+    if name.startswith(("gt", "eq")):
+        return name[2:]
+    if name.startswith("set"):
+        return name[3]
+    return "r" + name[3]
+
+def get_instruction_expression(instruction: Instruction, index: int,
+                               ip_register: int) -> Tuple[int, str]:
+    """
+        Get the output register of an instruction and a Python expression for its value,
+        with registers as local variables r0, r1...
+        The instruction pointer register always holds the index of the instruction, so
+        it is replaced by that, and instructions that only use constants are folded
+    """
+    opcode, *operands, output = instruction
+    name = get_opcode_name(opcode)
+    values = []
+    for kind, operand in zip(get_operand_kinds(name), operands):
+        if kind == "r" and operand != ip_register:
+            values.append(f"r{operand}")
+        else:
+            values.append(str(index if kind == "r" else operand))
+    expression = EXPRESSIONS[name if name in EXPRESSIONS else name[:3]].format(*values)
+    if not any(value.startswith("r") for value in values):
+        expression = str(eval(expression))  # pylint: disable=eval-used
+    return output, expression
+
+# instructions inlined into one block before it has to go back through the dispatch
+BLOCK_LIMIT = 64
+# an instruction pointer set to a register plus a constant, either way round
+BRANCH = re.compile(r"r(\d+) \+ (\d+)|(\d+) \+ r(\d+)")
+
+class BlockWriter:
+    """
+        Writes the blocks of a compiled program, one for each instruction index
+
+        A block runs from its instruction until it has to jump somewhere unknown (or
+        somewhere it has already been), which it does by setting ip. Jumps to a constant
+        are followed straight on, and jumps that add a comparison result (which is known
+        to be 0 or 1) to the instruction pointer become an if. Each branch only holds the
+        code up to where the two branches meet, so no instruction is written twice in a
+        block and the source grows linearly with the program
+    """
+    __slots__ = ["lines", "instructions", "ip_register"]
+
+    def __init__(self, lines: List[str], instructions: Sequence[Instruction], ip_register: int):
+        self.lines = lines
+        self.instructions = instructions
+        self.ip_register = ip_register
+
+    def get_expression(self, index: int) -> Tuple[int, str]:
+        """
+            Get the output register and expression of an instruction
+        """
+        return get_instruction_expression(self.instructions[index], index, self.ip_register)
+
+    def follow(self, index: int, visited: AbstractSet[int]) -> Tuple[List[int], int]:
+        """
+            Follow the instructions from an index for as long as they run straight on, and
+            get the indices followed and the index of the instruction it stopped at
+        """
+        route: List[int] = []
+        while 0 <= index < len(self.instructions) and index not in visited \
+                and index not in route and len(visited) + len(route) < BLOCK_LIMIT:
+            output, expression = self.get_expression(index)
+            if output != self.ip_register:
+                route.append(index)
+                index += 1
+            elif expression.isdigit():
+                route.append(index)
+                index = int(expression) + 1
+            else:
+                break
+        return route, index
+
+    def get_route_lines(self, route: Sequence[int], indent: str,
+                        booleans: FrozenSet[int]) -> Tuple[List[str], FrozenSet[int]]:
+        """
+            Get the lines for a route (see follow) and the registers holding a comparison
+            result at the end of it
+        """
+        lines = []
+        for index in route:
+            output, expression = self.get_expression(index)
+            if output != self.ip_register:
+                lines.append(f"{indent}r{output} = {expression}")
+                is_comparison = get_opcode_name(self.instructions[index][0]).startswith(
+                    ("gt", "eq"))
+                booleans = (booleans - {output}) | ({output} if is_comparison else set())
+        return lines, booleans
+
+    def add_block(self, index: int, indent: str):
+        """
+            Add the block for an instruction index
+        """
+        visited: Set[int] = set()
+        booleans: FrozenSet[int] = frozenset()
+        while True:
+            route, index = self.follow(index, visited)
+            lines, booleans = self.get_route_lines(route, indent, booleans)
+            self.lines.extend(lines)
+            visited.update(route)
+            if not 0 <= index < len(self.instructions) or index in visited \
+                    or len(visited) >= BLOCK_LIMIT:
+                self.lines.append(f"{indent}ip = {index}")
+                return
+            visited.add(index)
+            joined = self.add_branches(index, indent, visited, booleans)
+            if joined is None:
+                return
+            index, booleans = joined
+
+    def add_branches(self, index: int, indent: str, visited: Set[int],
+                     booleans: FrozenSet[int]) -> Optional[Tuple[int, FrozenSet[int]]]:
+        """
+            Add the code for an instruction that sets the instruction pointer, and if it
+            becomes an if whose branches meet, get where they meet and the comparison
+            results known there (the block has to stop otherwise)
+        """
+        expression = self.get_expression(index)[1]
+        match = BRANCH.fullmatch(expression)
+        if match is None or int(match.group(1) or match.group(4)) not in booleans:
+            self.lines.append(f"{indent}ip = ({expression}) + 1")
+            return None
+        register = int(match.group(1) or match.group(4))
+        offset = int(match.group(2) or match.group(3))
+        branches = [self.follow(target, visited) for target in (offset + 2, offset + 1)]
+        stops = [route + [end] for route, end in branches]
+        join = next((stop for stop in stops[0] if stop in stops[1]), None)
+        if join is None:
+            self.add_exits(register, branches, indent, booleans)
+            return None
+        # the code from the join on is the same for both, so it is only written once
+        taken, not_taken = (route[:stop.index(join)] for (route, _), stop in zip(branches, stops))
+        visited.update(taken + not_taken)
+        return join, self.add_if(register, taken, not_taken, indent, booleans)
+
+    def add_exits(self, register: int, branches: List[Tuple[List[int], int]], indent: str,
+                  booleans: FrozenSet[int]):
+        """
+            Add an if on a comparison result whose branches don't meet, so each one goes
+            back through the dispatch once its route (see follow) is done
+        """
+        for condition, (route, end) in zip((f"if r{register}:", "else:"), branches):
+            self.lines.append(indent + condition)
+            self.lines.extend(self.get_route_lines(route, indent + "    ", booleans)[0])
+            self.lines.append(f"{indent}    ip = {end}")
+
+    def add_if(self, register: int, taken: List[int], not_taken: List[int], indent: str,
+               booleans: FrozenSet[int]) -> FrozenSet[int]:
+        """
+            Add an if on a comparison result with the routes for each branch, and get the
+            comparison results known after it
+        """
+        taken_lines, taken_booleans = self.get_route_lines(taken, indent + "    ", booleans)
+        lines, not_taken_booleans = self.get_route_lines(not_taken, indent + "    ", booleans)
+        if taken_lines:
+            self.lines.append(f"{indent}if r{register}:")
+            self.lines.extend(taken_lines)
+        if lines:
+            self.lines.append(f"{indent}else:" if taken_lines else f"{indent}if not r{register}:")
+            self.lines.extend(lines)
+        return taken_booleans & not_taken_booleans
+
+def get_program_source(instructions: Sequence[Instruction], ip_register: int,
+                       number_of_registers: int = 6) -> str:
+    """
+        Get the source of a Python function run(registers) for a program
+
+        Each instruction index gets a block (see BlockWriter), and a binary search on ip
+        picks the block to run next
+    """
+    registers = ", ".join(f"r{register}" for register in range(number_of_registers))
+    lines = ["def run(registers):",
+             f"    {registers}, = registers",
+             "    ip = 0",
+             f"    while 0 <= ip < {len(instructions)}:"]
+    writer = BlockWriter(lines, instructions, ip_register)
+
+    def add_dispatch(low: int, high: int, indent: str):
+        if low == high:
+            writer.add_block(low, indent)
+            return
+        middle = (low + high) // 2
+        lines.append(f"{indent}if ip <= {middle}:")
+        add_dispatch(low, middle, indent + "    ")
+        lines.append(f"{indent}else:")
+        add_dispatch(middle + 1, high, indent + "    ")
+
+    add_dispatch(0, len(instructions) - 1, " " * 8)
+    # the instruction pointer register is left holding the last instruction run
+    lines.append(f"    r{ip_register} = ip - 1")
+    lines.append(f"    return [{registers}]")
+    return "\n".join(lines) + "\n"
+
+def compile_program(instructions: Sequence[Instruction], ip_register: int,
+                    number_of_registers: int = 6) -> Callable[[Sequence[int]], List[int]]:
+    """
+        Compile a program into a Python function that takes the starting registers and
+        returns the registers once the program halts (see get_program_source)
+    """
+    namespace: Dict[str, Any] = {}
+    source = get_program_source(instructions, ip_register, number_of_registers)
+    exec(compile(source, "<program>", "exec"), namespace)  # pylint: disable=exec-used
+    return namespace["run"]
+
+def get_flat_operation(name: str) -> Callable[[int, int, int, List[int]], None]:
+    """
+        Get a function(a, b, c, registers) for an opcode that sets registers[c] in one go
+        (rather than through apply_to_registers and the other opcode functions)
+    """
+    values = [f"registers[{operand}]" if kind == "r" else operand
+              for kind, operand in zip(get_operand_kinds(name), "ab")]
+    expression = EXPRESSIONS[name if name in EXPRESSIONS else name[:3]].format(*values)
+    namespace: Dict[str, Any] = {}
+    source = f"def {name}(a, b, c, registers):\n    registers[c] = {expression}\n"
+    exec(compile(source, f"<{name}>", "exec"), namespace)  # pylint: disable=exec-used
+    return namespace[name]
+
+# the flat operations, numbered in the same order as OPCODES
+OPERATIONS = [get_flat_operation(opcode.__name__) for opcode in OPCODES]
+OPCODE_NUMBERS = {opcode.__name__: number for number, opcode in enumerate(OPCODES)}
+
+class Machine:
+    """
+        A register machine that runs a program coded as integers, four per instruction
+        (the opcode number, as in OPCODES, and its three operands), through OPERATIONS
+        Without an instruction pointer register the program just runs from top to bottom
+        The program is also decoded once into the operation and operands of each
+        instruction (program), which is what actually runs
+    """
+    __slots__ = ["registers", "ip_register", "code", "program"]
+
+    def __init__(self, instructions: Sequence[Instruction], ip_register: Optional[int] = None,
+                 number_of_registers: int = 6):
+        self.registers = [0] * number_of_registers
+        self.ip_register = ip_register
+        self.code = array("q")
+        for opcode, *operands in instructions:
+            self.code.append(OPCODE_NUMBERS[get_opcode_name(opcode)])
+            self.code.extend(operands)
+        self.program = [self.get_instruction(ip) for ip in range(len(self))]
+
+    def __len__(self):
+        return len(self.code) // 4
+
+    def load(self, registers: Sequence[int]) -> "Machine":
+        """
+            Set the registers (keeping the same number of them)
+        """
+        assert len(registers) == len(self.registers)
+        self.registers[:] = registers
+        return self
+
+    def get_instruction(self, ip: int) -> Tuple[Callable, int, int, int]:
+        """
+            Get the operation and operands of an instruction
+        """
+        opcode, value1, value2, output = self.code[4 * ip:4 * ip + 4]
+        return OPERATIONS[opcode], value1, value2, output
+
+    def run(self) -> List[int]:
+        """
+            Run the program until it halts and get the registers
+        """
+        program, registers, ip_register = self.program, self.registers, self.ip_register
+        if ip_register is None:
+            for operation, value1, value2, output in program:
+                operation(value1, value2, output, registers)
+            return registers
+        end = len(program)
+        ip = 0
+        while 0 <= ip < end:
+            registers[ip_register] = ip
+            operation, value1, value2, output = program[ip]
+            operation(value1, value2, output, registers)
+            ip = registers[ip_register] + 1
+        return registers
+
+    def run_from(self, ip: int, stops: AbstractSet[int] = frozenset(),
+                 known_jumps: Optional[AbstractSet[Tuple[int, int]]] = None) -> Tuple[int, int]:
+        """
+            Run the program from the instruction at ip until it halts, it gets to one of
+            the instructions in stops or, given known_jumps, it jumps backwards other than
+            by one of those (start, end) jumps, and get the last instruction it ran and the
+            next one it would run
+            The instruction at ip always runs, so it can be one of the stops
+        """
+        program, registers, ip_register = self.program, self.registers, self.ip_register
+        assert ip_register is not None, "Only a program with an instruction pointer can jump"
+        end = len(program)
+        while True:
+            registers[ip_register] = ip
+            operation, value1, value2, output = program[ip]
+            operation(value1, value2, output, registers)
+            last, ip = ip, registers[ip_register] + 1
+            if not 0 <= ip < end or ip in stops or (known_jumps is not None and ip <= last
+                                                    and (ip, last) not in known_jumps):
+                return last, ip
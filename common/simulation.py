@@ -0,0 +1,41 @@
+"""
+    A module for running simulations for a large number of generations
+"""
+from collections import namedtuple
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# how to follow a state that repeats in a different position: offset(state) gives its position
+# and shift(state, distance) moves it along by a distance
+Translation = namedtuple("Translation", ["offset", "shift"])
+NO_TRANSLATION = Translation(lambda _: 0, lambda state, _: state)
+
+def fast_forward(state: Any, step: Callable[[Any], Any], generations: int,
+                 fingerprint: Callable[[Any], Hashable] = hash,
+                 translation: Optional[Translation] = None) -> Any:
+    """
+        Step the state through a number of generations and return the last state
+        Once a fingerprint repeats, the whole cycles left are skipped straight away
+
+        Only fingerprints are remembered, so they should be cheap (such as a hash)
+        A state that repeats in a different position (a translated repeat) should
+        fingerprint the same and be given a translation; the skipped cycles are then
+        applied by shifting it the distance it moved over those cycles
+    """
+    offset, shift = translation or NO_TRANSLATION
+    seen: Dict[Hashable, Tuple[int, int]] = {}
+    generation = 0
+    while generation < generations:
+        state = step(state)
+        generation += 1
+        key = fingerprint(state)
+        if key in seen:
+            last_generation, last_offset = seen[key]
+            cycle_length = generation - last_generation
+            cycles = (generations - generation) // cycle_length
+            state = shift(state, (offset(state) - last_offset) * cycles)
+            generation += cycles * cycle_length
+            # whatever is left is less than a cycle, so just step through it
+            seen.clear()
+        else:
+            seen[key] = (generation, offset(state))
+    return state
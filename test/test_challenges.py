@@ -1,3 +1,5 @@
+import pytest
+
 
 def test_day1():
     from challenge1 import NUMBERS, get_sum_of_frequencies, get_first_frequency_listed_twice
@@ -31,8 +33,11 @@ def test_day5():
 
 def test_day6():
     from challenge6 import POINTS, get_largest_finite_region, get_safest_finite_region
+    from common.grid import Point
     assert get_largest_finite_region(POINTS) == 3989
     assert get_safest_finite_region(POINTS) == 49715
+    example = [Point(1, 1), Point(1, 6), Point(8, 3), Point(3, 4), Point(5, 5), Point(8, 9)]
+    assert get_safest_finite_region(example, 32) == 16
 
 def test_day7():
     from challenge7 import STEPS, get_topologically_sorted_steps, get_total_time_needed
@@ -66,11 +71,19 @@ def test_day14():
     assert get_after_improvement_point(IMPROVEMENT_POINT) == "1132413111"
     assert get_recipes_before_improvement_point(IMPROVEMENT_POINT) == 20340232
 
+def test_day15():
+    from challenge15 import CAVE, Battlefield, get_lowest_outcome_where_no_elves_die
+    assert Battlefield(CAVE).battle() == 261855
+    assert get_lowest_outcome_where_no_elves_die(CAVE) == 59568
+
 def test_day16():
     from challenge16 import (SAMPLES,
                              PROGRAM,
+                             Sample,
+                             get_number_of_matches,
                              get_samples_matching_three_or_more,
                              get_program_results)
+    assert get_number_of_matches(Sample([3, 2, 1, 1], [9, 2, 1, 2], [3, 2, 2, 1])) == 3
     assert get_samples_matching_three_or_more(SAMPLES) == 493
     assert get_program_results(SAMPLES, PROGRAM) == 445
 
@@ -84,10 +97,26 @@ def test_day18():
     transform_over_time(GRID, 10)
     assert(get_total_resource_value(GRID) == 384416)
 
+def test_day18_vectorized_matches_per_acre():
+    pytest.importorskip("numpy")
+    from challenge18 import transform_codes, to_codes, transform_grid
+    from common.grid import TextGrid
+    grid = TextGrid([".#.#...|#.", ".....#|##|", ".|..|...#.", "..|#.....#", "#.#|||#|#|",
+                     "...#.||...", ".|....|...", "||...#|.#|", "|.||||..|.", "...#.|..|."], ".")
+    codes = to_codes(grid)
+    for _ in range(10):
+        transform_grid(grid)
+        codes = transform_codes(codes)
+        assert (codes == to_codes(grid)).all()
+
 def test_day19():
-    from challenge19 import get_actual_value
-    assert get_actual_value(875) == 1248
-    assert get_actual_value(10551275) == 14952912
+    from challenge19 import (INSTRUCTIONS,
+                             INSTRUCTION_REGISTER,
+                             get_compiled_program_value,
+                             get_program_value)
+    assert get_compiled_program_value(INSTRUCTIONS, INSTRUCTION_REGISTER, [0] * 6) == 1248
+    assert get_program_value(INSTRUCTIONS, INSTRUCTION_REGISTER, [0] * 6) == 1248
+    assert get_program_value(INSTRUCTIONS, INSTRUCTION_REGISTER, [1, 0, 0, 0, 0, 0]) == 14952912
 
 def test_day20():
     from challenge20 import CAVE
@@ -0,0 +1,73 @@
+import pytest
+from common.device import Profile, get_compared_values, get_divisors, run_program, to_instruction
+
+def to_instructions(text):
+    return [to_instruction(line) for line in text.strip().splitlines()]
+
+def test_divisors():
+    assert sorted(get_divisors(1)) == [1]
+    assert sorted(get_divisors(875)) == [1, 5, 7, 25, 35, 125, 175, 875]
+    assert sorted(get_divisors(97)) == [1, 97]
+
+def test_compared_values_need_a_comparison():
+    program = to_instructions("""
+        addi 1 1 1
+        eqrr 1 0 2
+    """)
+    with pytest.raises(ValueError):
+        list(get_compared_values(program, 3, 4, [0] * 5))
+
+def test_counted_increment_is_skipped():
+    # r1 counts up to r0 a billion times over unless the loop is spotted
+    program = to_instructions("""
+        seti 0 0 1
+        addi 1 1 1
+        gtrr 1 0 2
+        addr 2 3 3
+        seti 0 0 3
+    """)
+    assert run_program(program, 3, [10 ** 9, 0, 0, 0])[:3] == [10 ** 9, 10 ** 9 + 1, 1]
+
+def test_divisor_sum_with_other_registers():
+    # the day 19 loops with the registers shuffled and the commutative operands swapped
+    program = to_instructions("""
+        seti 1 0 4
+        seti 1 0 0
+        mulr 0 4 1
+        eqrr 5 1 1
+        addr 3 1 3
+        addi 3 1 3
+        addr 2 4 2
+        addi 0 1 0
+        gtrr 0 5 1
+        addr 1 3 3
+        seti 1 0 3
+        addi 4 1 4
+        gtrr 4 5 1
+        addr 3 1 3
+        seti 0 0 3
+    """)
+    assert run_program(program, 3, [0, 0, 0, 0, 0, 10551275])[2] == 14952912
+    assert run_program(program, 3, [0, 0, 0, 0, 0, 60])[2] == 168
+
+def test_profile_records_loop_until_it_is_skipped():
+    program = to_instructions("""
+        seti 0 0 1
+        addi 1 1 1
+        gtrr 1 0 2
+        addr 2 3 3
+        seti 0 0 3
+    """)
+    profile = Profile(sample_every=10)
+    assert run_program(program, 3, [100, 0, 0, 0], profile)[:3] == [100, 101, 1]
+    assert profile.steps == 1 + 16 * 4
+    assert profile.counters.hits[1] == 16
+    assert profile.counters.back_edges[1, 4] == 16
+    assert profile.counters.skipped_loops[1, 4] == 1
+    assert profile.maximums[:3] == [100, 16, 0]
+    assert [(step, ip) for step, ip, _ in profile.writer.read()] == [
+        (10, 1), (20, 3), (30, 1), (40, 3), (50, 1), (60, 3)]
+
+    unskipped = Profile(skip_loops=False)
+    assert run_program(program, 3, [100, 0, 0, 0], unskipped)[1] == 101
+    assert unskipped.steps == 1 + 101 * 4 - 1
@@ -0,0 +1,40 @@
+import pytest
+
+from common import distances
+from common.distances import PointSet
+from common.grid import get_manhattan_distance
+
+POINTS = [(0, 0, 0), (3, -1, 2), (-2, 4, 1), (1, 1, 1), (5, 5, -5)]
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(distances, "np", None)
+
+def test_one_to_many(backend):
+    points = PointSet(POINTS)
+    assert list(points.get_distances((1, 0, 0))) == [
+        get_manhattan_distance(p, (1, 0, 0)) for p in POINTS]
+    assert points.get_indices_within((0, 0, 0), 3) == [0, 3]
+    assert points.count_within((0, 0, 0), [0, 6, 6, 2, 6]) == 2
+
+def test_many_to_many(backend):
+    points, seeds = PointSet(POINTS), PointSet([(0, 0, 0), (2, 2, 2)])
+    tiles = list(points.get_distance_tiles(points, tile_size=2))
+    assert [(row, column) for row, column, _ in tiles][:4] == [(0, 0), (0, 2), (0, 4), (2, 0)]
+    assert points.get_summed_distances(seeds) == [
+        sum(get_manhattan_distance(p, s) for s in seeds.points) for p in POINTS]
+    assert points.get_nearest(seeds) == [0, 1, None, None, 1]
+    assert sorted(points.get_pairs_within(6)) == sorted(
+        (i, j) for i in range(5) for j in range(i + 1, 5)
+        if get_manhattan_distance(POINTS[i], POINTS[j]) <= 6)
+
+def test_empty(backend):
+    empty, points = PointSet([]), PointSet(POINTS)
+    assert len(empty.get_distances((0, 0, 0))) == 0
+    assert empty.count_within((0, 0, 0), 3) == 0
+    assert not list(empty.get_pairs_within(6))
+    assert points.get_summed_distances(empty) == [0] * len(POINTS)
+    assert points.get_nearest(empty) == [None] * len(POINTS)
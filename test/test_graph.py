@@ -0,0 +1,55 @@
+import pytest
+from common.graph import Graph
+
+@pytest.fixture
+def graph():
+    graph = Graph()
+    for source, destination in [("C", "A"), ("C", "F"), ("A", "B"), ("A", "D"), ("B", "E"),
+                                ("D", "E"), ("F", "E")]:
+        graph.add_edge(source, destination)
+    return graph
+
+def test_roots_follow_edges_and_removals(graph):
+    assert graph.get_roots() == ["C"]
+    assert graph.get_in_degree("E") == 3
+    graph.remove_node("C")
+    assert sorted(graph.get_roots()) == ["A", "F"]
+    assert graph.get_nodes() == set("ABDEF")
+    graph.remove_edge("F", "E")
+    assert sorted(graph.get_roots()) == ["A", "F"]
+    assert graph.get_in_degree("E") == 2
+
+def test_topological_order_with_priority(graph):
+    assert "".join(graph.get_topological_order()) == "CABDFE"
+    assert "".join(graph.get_topological_order(lambda node: -ord(node))) == "CFADBE"
+    assert graph.get_roots() == ["C"]
+
+def test_topological_order_rejects_cycles():
+    graph = Graph()
+    for source, destination in [("A", "B"), ("B", "C"), ("C", "B")]:
+        graph.add_edge(source, destination)
+    with pytest.raises(ValueError):
+        list(graph.get_topological_order())
+    with pytest.raises(ValueError):
+        list(graph.freeze().get_topological_order())
+
+def test_frozen_graph_traverses_like_graph(graph):
+    frozen = graph.freeze()
+    assert len(frozen) == 6 and frozen.get_nodes() == graph.get_nodes()
+    assert sorted(frozen.get_edges("A")) == ["B", "D"]
+    assert sorted(frozen.get_node_distances("C")) == sorted(graph.get_node_distances("C"))
+    assert list(frozen.get_topological_order()) == list(graph.get_topological_order())
+
+def test_distance_queries_are_remembered_until_the_graph_changes():
+    graph = Graph()
+    for source, destination in [(0, 1), (1, 2), (0, 3), (3, 2), (2, 4)]:
+        graph.add_edge(source, destination)
+    assert list(graph.get_levels(0)) == [[0], [1, 3], [2], [4]]
+    assert graph.get_distance_histogram(0) == [1, 2, 1, 1]
+    assert (graph.get_max_distance(0), graph.count_at_least_distance(0, 2)) == (3, 2)
+    assert 0 in graph.distance_maps
+    graph.add_edge(4, 5)
+    assert graph.get_max_distance(0) == 4
+    graph.remove_node(2)
+    assert graph.get_distance_map(0) == {0: 0, 1: 1, 3: 1}
+    assert graph.freeze().get_distance_histogram(4) == [1, 1]
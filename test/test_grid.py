@@ -0,0 +1,146 @@
+from common.grid import (CHARACTERS, DenseGrid, Grid, LazyGrid, Point, TextGrid, from_packed,
+                         from_strings, get_orthogonally_adjacent, get_packed_orthogonally_adjacent,
+                         render_points, to_dense_grid, to_packed)
+
+def test_dense_grid_from_strings_pads_rows():
+    grid = from_strings(["#.#", "..", "E"], "#")
+    assert isinstance(grid, DenseGrid)
+    assert str(grid) == "#.#\n..#\nE##\n"
+    assert grid[Point(1, 0)] == "."
+    assert Point(3, 0) not in grid
+    assert grid.get(Point(3, 0), "x") == "x"
+
+def test_dense_grid_grows_when_set_outside():
+    grid = from_strings(["ab", "cd"], " ")
+    grid[Point(-1, 2)] = "e"
+    assert (grid.top, grid.left, grid.bottom, grid.right) == (0, -1, 2, 1)
+    assert str(grid) == " ab\n cd\ne  \n"
+
+def test_dense_grid_typed_cells():
+    grid = to_dense_grid([Point(0, 0), Point(2, 1)], 0, "q")
+    grid[Point(2, 1)] = 12
+    assert grid.get_matching_points(lambda _, v: v > 0) == [(Point(2, 1), 12)]
+    assert len(grid) == 6
+
+def test_character_grid_falls_back_to_a_list():
+    grid = from_strings(["ab", "cd"], " ")
+    grid[Point(1, 1)] = "G200"
+    assert grid.typecode is None
+    assert grid[Point(0, 1)] == "c" and grid[Point(1, 1)] == "G200"
+    grid[Point(2, 0)] = "e"
+    assert grid[Point(2, 1)] == " "
+    empty = to_dense_grid([Point(0, 0), Point(1, 1)], typecode=CHARACTERS)
+    assert empty.typecode is None and empty[Point(1, 1)] is None
+
+def test_dense_grid_iterates_like_grid():
+    grid = DenseGrid(top=0, left=0, bottom=1, right=1, fill=".", typecode=CHARACTERS)
+    assert list(grid) == [Point(0, 0), Point(0, 1), Point(1, 0), Point(1, 1)]
+
+def test_lazy_grid_only_evaluates_visited_points():
+    evaluated = []
+    def fill(point):
+        evaluated.append(point)
+        return point.x * point.y
+    grid = LazyGrid(top=0, left=0, bottom=9, right=9, fill_function=fill)
+    assert len(list(grid)) == 100
+    assert grid[Point(3, 4)] == 12
+    assert grid[Point(3, 4)] == 12
+    assert evaluated == [Point(3, 4)]
+
+def test_lazy_grid_evaluates_deep_recurrences_without_recursion():
+    def fill(point):
+        if point.x == 0 or point.y == 0:
+            return 1
+        return (grid[Point(point.x - 1, point.y)] + grid[Point(point.x, point.y - 1)]) % 1000
+    grid = LazyGrid(top=0, left=0, fill_function=fill)
+    expected = (grid[Point(1999, 3)] + grid[Point(2000, 2)]) % 1000
+    assert grid[Point(2000, 3)] == expected
+    assert Point(10**6, 10**6) in grid
+    assert Point(-1, 0) not in grid
+
+def test_render_only_redraws_dirty_rows():
+    grid = from_strings(["abc", "def"], " ")
+    assert str(grid) == "abc\ndef\n"
+    grid[Point(1, 1)] = "X"
+    assert grid.rendered_rows == {0: "abc"}
+    assert str(grid) == "abc\ndXf\n"
+    assert grid.render(Point(1, -5), Point(9, 0)) == "bc\n"
+
+def test_render_points_viewport():
+    points = [Point(1, 1), Point(3, 0), Point(9, 9)]
+    assert render_points(points, Point(0, 0), Point(3, 1)) == "   #\n #  \n"
+
+def test_text_grid_index_follows_changes():
+    grid = TextGrid(["#E.G", "#..E"], "#", indexed="EG")
+    assert grid.get_characters("E") == [(Point(1, 0), "E"), (Point(3, 1), "E")]
+    grid.move(Point(1, 0), Point(2, 0), ".")
+    del grid[Point(3, 1)]
+    assert grid.get_characters("E") == grid.get_characters(lambda _, c: c == "E")
+    assert (grid.count("E"), grid.count("G"), grid.count(".")) == (1, 1, 3)
+
+def test_text_grid_index_follows_growth():
+    grid = TextGrid(["#E", "G#"], "#", indexed="#E")
+    grid[Point(3, 1)] = "E"
+    assert grid.get_characters("#") == grid.get_characters(lambda _, c: c == "#")
+    assert (grid.count("#"), grid.count("E")) == (5, 2)
+
+def test_distance_field_and_best_next_step():
+    cave = TextGrid(["#######",
+                     "#E..G.#",
+                     "#...#.#",
+                     "#.G.#G#",
+                     "#######"], "#")
+    distances = cave.get_distance_field([Point(1, 1), Point(5, 3)], "#EG")
+    assert (distances[Point(3, 1)], distances[Point(5, 1)], distances[Point(1, 3)]) == (2, 2, 2)
+    targets = [Point(3, 1), Point(5, 1), Point(2, 2), Point(3, 3)]
+    assert sorted(cave.get_closest_targets(Point(1, 1), targets, "#EG")) == [
+        (Point(2, 2), 2), (Point(3, 1), 2)]
+    assert cave.get_best_next_step(Point(1, 1), Point(3, 1), 2, "#EG") == Point(2, 1)
+    assert cave.get_best_next_step(Point(1, 1), Point(2, 2), 2, "#EG") == Point(2, 1)
+
+def test_summed_area_table_is_rebuilt_after_changes():
+    grid = Grid(top=0, left=0, bottom=2, right=3, fill_function=lambda p: p.x + 10 * p.y)
+    table = grid.get_summed_area_table()
+    assert table.get_sum(Point(1, 1), Point(2, 2)) == 11 + 12 + 21 + 22
+    assert table.get_sum(Point(-5, -5), Point(0, 0)) == 0
+    assert dict(table.get_window_sums(3, 3))[Point(1, 0)] == sum(range(1, 4)) * 3 + 90
+    grid[Point(2, 2)] = 100
+    assert grid.get_summed_area_table().get_sum(Point(2, 2), Point(3, 2)) == 123
+
+def test_neighbour_tables_are_clipped_to_the_grid():
+    grid = from_strings(["abc", "def"], " ")
+    assert grid.get_neighbours(Point(0, 0)) == [Point(1, 0), Point(0, 1)]
+    assert list(grid.get_neighbour_offsets(0)) == [-1, -1, 1, 3]
+    assert grid.get_cell(4) == "e"
+    assert grid.get_neighbours(Point(1, 1), diagonal=True) == [
+        Point(1, 0), Point(0, 1), Point(2, 1), Point(0, 0), Point(2, 0)]
+    # points off the grid still get their neighbours that are on it
+    assert grid.get_neighbours(Point(3, 1)) == [Point(2, 1)]
+    grid[Point(1, 2)] = "g"
+    assert grid.get_neighbours(Point(1, 1)) == [Point(1, 0), Point(0, 1), Point(2, 1), Point(1, 2)]
+    text = TextGrid(["ab", "cd"], " ")
+    assert text.get_surrounding(Point(2, 2)) == [(Point(1, 1), "d")]
+    assert text.is_adjacent_to(Point(-1, 0), "a")
+    assert text.get_surrounding_characters(Point(0, 0)) == ["b", "c", "d"]
+    assert text.get_adjacent(Point(1, 1), "c") == [Point(0, 1)]
+    assert text.is_adjacent_to(Point(1, 1), "b") and not text.is_adjacent_to(Point(1, 1), "a")
+
+def test_packed_points_round_trip_and_move_like_points():
+    points = [Point(0, 0), Point(-3, 7), Point(12, -5), Point(-1, -1), Point(1000, 2000)]
+    for point in points:
+        assert from_packed(to_packed(point)) == point
+        assert [from_packed(p) for p in get_packed_orthogonally_adjacent(to_packed(point))] == \
+            get_orthogonally_adjacent(point)
+
+def test_fingerprint_is_kept_up_to_date():
+    grid = from_strings(["ab", "cd"], " ")
+    sparse = Grid(top=0, left=0, bottom=1, right=1, fill_function=lambda p: "abcd"[p.x + 2 * p.y])
+    original = grid.get_fingerprint()
+    assert sparse.get_fingerprint() == original
+    grid[Point(1, 1)] = "x"
+    sparse[Point(1, 1)] = "x"
+    assert grid.get_fingerprint() == sparse.get_fingerprint() != original
+    grid[Point(1, 1)] = "d"
+    assert grid.get_fingerprint() == original
+    grid[Point(2, 0)] = " "
+    assert grid.get_fingerprint() == from_strings(["ab ", "cd "], " ").get_fingerprint()
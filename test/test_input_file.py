@@ -0,0 +1,98 @@
+import importlib
+
+import pytest
+
+from challenge1 import get_sum_of_frequencies
+from challenge2 import get_checksum
+from common import input_file
+from common.input_file import (extract_integers, get_transformed_input, iterate_numbers,
+                               iterate_strings, iterate_transformed_batches, read_integer_records,
+                               read_formatted_input, read_numbers, read_parsed_input,
+                               read_single_line, register_line_format)
+
+def test_streamed_input(tmp_path):
+    numbers = tmp_path / "numbers.txt"
+    numbers.write_text("\n".join(str(n) for n in range(-5, 2500)) + "\n")
+    assert get_sum_of_frequencies(iterate_numbers(str(numbers))) == sum(range(-5, 2500))
+    batches = iterate_transformed_batches(str(numbers), len, batch_size=1000)
+    assert list(batches) == [1000, 1000, 505]
+    assert read_single_line(str(numbers), int) == -5
+
+    box_ids = tmp_path / "box_ids.txt"
+    box_ids.write_text("abcdef\nbababc\nabbcde\nabcccd\naabcdd\nabcdee\nababab\n")
+    assert get_checksum(iterate_strings(str(box_ids))) == 12
+
+def test_parsed_input_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(input_file, "CACHE_DIRECTORY", str(tmp_path / "cache"))
+    parsed = []
+    def parse(lines):
+        parsed.append(lines)
+        return [int(line) * 2 for line in lines]
+    numbers = tmp_path / "numbers.txt"
+    numbers.write_text("1\n2\n")
+    assert read_parsed_input(str(numbers), parse) == [2, 4]
+    assert read_parsed_input(str(numbers), parse) == [2, 4]
+    assert len(parsed) == 1
+    assert get_transformed_input(str(numbers), int, cache=True) == [1, 2]
+    numbers.write_text("1\n2\n3\n")
+    assert read_parsed_input(str(numbers), parse) == [2, 4, 6]
+    assert get_transformed_input(str(numbers), int, cache=True) == [1, 2, 3]
+    assert len(parsed) == 2
+
+def test_parsed_input_is_parsed_again_when_a_helper_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(input_file, "CACHE_DIRECTORY", str(tmp_path / "cache"))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    helpers = tmp_path / "parse_helpers.py"
+    parse = "def parse(lines):\n    return [scale(int(line)) for line in lines]\n"
+    helpers.write_text(f"def scale(n):\n    return n * 2\n{parse}")
+    numbers = tmp_path / "numbers.txt"
+    numbers.write_text("1\n2\n")
+    module = importlib.import_module("parse_helpers")
+    assert read_parsed_input(str(numbers), module.parse) == [2, 4]
+    helpers.write_text(f"def scale(n):\n    return n * 10\n{parse}")
+    module = importlib.reload(module)
+    assert read_parsed_input(str(numbers), module.parse) == [10, 20]
+
+def test_parsed_input_that_cannot_be_pickled_is_not_cached(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(input_file, "CACHE_DIRECTORY", str(cache))
+    numbers = tmp_path / "numbers.txt"
+    numbers.write_text("1\n2\n")
+    def parse(lines):
+        # a local function can't be pickled
+        return lines, lambda: len(lines)
+    parsed, count_lines = read_parsed_input(str(numbers), parse)
+    assert (parsed, count_lines()) == (["1", "2"], 2)
+    assert not list(cache.iterdir())
+
+def test_bulk_integers(tmp_path):
+    assert extract_integers("pos=<-3,40,+5>, r=12").tolist() == [-3, 40, 5, 12]
+    stars = tmp_path / "stars.txt"
+    stars.write_text("position=< 9,  1> velocity=< 0,  2>\nposition=<-3, 11> velocity=< 1, -2>\n")
+    assert read_integer_records(str(stars), 4) == [(9, 1, 0, 2), (-3, 11, 1, -2)]
+    with pytest.raises(ValueError):
+        read_integer_records(str(stars), 3)
+
+def test_numbers_are_one_to_a_line(tmp_path):
+    numbers = tmp_path / "numbers.txt"
+    numbers.write_text("+1\n-2\n\n3\n")
+    assert read_numbers(str(numbers)) == [1, -2, 3]
+    numbers.write_text("+1\n-2, 3\n")
+    with pytest.raises(ValueError):
+        read_numbers(str(numbers))
+
+def test_line_formats(tmp_path):
+    claim = register_line_format("TestClaim", "#{id:int} @ {left:int},{top:int}: {size}")
+    assert claim.parse("#12 @ 3,-4: 5x6") == (12, 3, -4, "5x6")
+    assert claim.parse("#12 @ 3,-4: 5x6").left == 3
+    with pytest.raises(ValueError):
+        claim.parse("#12 @ 3,4")
+    claims = tmp_path / "claims.txt"
+    claims.write_text("#1 @ 1,3: 4x4\n#2 @ 3,1: 4x4\n\n#3 @ 5,5: 2x2\n")
+    records = read_formatted_input(str(claims), "TestClaim")
+    assert [r.id for r in records] == [1, 2, 3]
+    columns = claim.to_columns(records)
+    assert columns.left.tolist() == [1, 3, 5] and columns.size == ["4x4", "4x4", "2x2"]
+    claims.write_text("#1 @ 1,3: 4x4\n#2 @ 3,1 4x4\n")
+    with pytest.raises(ValueError):
+        read_formatted_input(str(claims), "TestClaim")
@@ -0,0 +1,69 @@
+from common.opcodes import (BLOCK_LIMIT, OPCODE_MAPPING, OPCODES, OPERATIONS, Machine,
+                            compile_program, get_program_source)
+
+# the example program from day 19
+EXAMPLE = [("seti", 5, 0, 1), ("seti", 6, 0, 2), ("addi", 0, 1, 0), ("addr", 1, 2, 3),
+           ("setr", 1, 0, 0), ("seti", 8, 0, 4), ("seti", 9, 0, 5)]
+
+def to_instructions(program):
+    return [(OPCODE_MAPPING[name], a, b, c) for name, a, b, c in program]
+
+def test_compiled_example_matches_puzzle():
+    run = compile_program(to_instructions(EXAMPLE), 0)
+    assert run([0] * 6) == [6, 5, 6, 0, 0, 9]
+
+def test_compiled_loop_with_comparison_branch():
+    # r1 counts up to r0, adding r1 to r2 each time; ip is bound to r5
+    program = [("seti", 0, 0, 1), ("seti", 0, 0, 2), ("addi", 1, 1, 1), ("addr", 2, 1, 2),
+               ("gtrr", 1, 0, 3), ("addr", 5, 3, 5), ("seti", 1, 0, 5)]
+    instructions = to_instructions(program)
+    assert "if r3:" in get_program_source(instructions, 5)
+    assert compile_program(instructions, 5)([10, 0, 0, 0, 0, 0])[:4] == [10, 11, 66, 1]
+
+def test_compiled_chain_of_conditional_skips_stays_small():
+    # each step skips adding 1 to r2 when r0 > step; ip is bound to r5
+    program = []
+    for step in range(20):
+        program += [("gtri", 0, step, 1), ("addr", 1, 5, 5), ("addi", 2, 1, 2)]
+    instructions = to_instructions(program)
+    assert len(get_program_source(instructions, 5).splitlines()) < BLOCK_LIMIT * len(instructions)
+    for registers in ([0] * 6, [7, 0, 0, 0, 0, 0], [30, 0, 0, 0, 0, 0]):
+        assert compile_program(instructions, 5)(registers) == \
+            Machine(instructions, 5).load(registers).run()
+
+def test_compiled_jumps_to_a_computed_instruction_pointer():
+    # ip is bound to r5, and r4 counts the instructions run after the jump
+    program = [("seti", 6, 0, 0), ("seti", 12, 0, 1), ("banr", 0, 1, 5), ("seti", 1, 0, 2),
+               ("seti", 2, 0, 3), ("seti", 3, 0, 4)]
+    assert compile_program(to_instructions(program), 5)([0] * 6) == [6, 12, 0, 0, 3, 5]
+    for jump, registers in [(("banr", 0, 1, 5), [6, 12]), (("borr", 0, 1, 5), [2, 1]),
+                            (("eqrr", 0, 1, 5), [3, 3]), (("gtri", 0, 5, 5), [7, 0])]:
+        instructions = to_instructions([jump] + [("addi", 4, 1, 4)] * 6)
+        registers = registers + [0] * 4
+        assert compile_program(instructions, 5)(registers) == \
+            Machine(instructions, 5).load(registers).run()
+
+def test_machine_matches_opcode_functions():
+    for number, opcode in enumerate(OPCODES):
+        registers = [3, 2, 1, 1]
+        assert OPERATIONS[number] is not opcode
+        OPERATIONS[number](2, 1, 2, registers)
+        assert registers == opcode(2, 1, 2, [3, 2, 1, 1])
+    machine = Machine(to_instructions(EXAMPLE), 0)
+    assert machine.run() == [6, 5, 6, 0, 0, 9]
+    assert machine.load([0] * 6).run() == [6, 5, 6, 0, 0, 9]
+
+def test_machine_without_instruction_pointer():
+    machine = Machine([(OPCODE_MAPPING["seti"], 5, 0, 1), ("mulr", 1, 1, 0)],
+                      number_of_registers=4)
+    assert machine.run() == [25, 5, 0, 0]
+
+def test_machine_runs_from_an_instruction_until_it_stops():
+    # r1 counts up to r0 (see test_compiled_loop_with_comparison_branch); ip is bound to r5
+    program = [("seti", 0, 0, 1), ("seti", 0, 0, 2), ("addi", 1, 1, 1), ("addr", 2, 1, 2),
+               ("gtrr", 1, 0, 3), ("addr", 5, 3, 5), ("seti", 1, 0, 5)]
+    machine = Machine(to_instructions(program), 5).load([3, 0, 0, 0, 0, 0])
+    assert machine.run_from(0, {3}) == (2, 3)
+    assert machine.run_from(3, known_jumps=set()) == (6, 2)
+    assert machine.run_from(2, known_jumps={(2, 6)}) == (5, 7)
+    assert machine.registers[:4] == [3, 4, 10, 1]
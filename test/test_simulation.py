@@ -0,0 +1,20 @@
+from common.simulation import Translation, fast_forward
+
+def test_fast_forward_skips_cycles():
+    steps = []
+    def step(state):
+        steps.append(state)
+        return (state * 3 + 1) % 7
+    assert fast_forward(0, step, 10**12) == fast_forward(0, lambda s: (s * 3 + 1) % 7, 10**12 % 6)
+    assert len(steps) < 20
+
+def test_fast_forward_translated_repeats():
+    # a glider that moves 2 to the right every 3 generations
+    def step(state):
+        phase, position = state
+        return ((phase + 1) % 3, position + (2 if phase == 2 else 0))
+    def shift(state, distance):
+        return (state[0], state[1] + distance)
+    final = fast_forward((0, 0), step, 10**9 + 1, fingerprint=lambda s: s[0],
+                         translation=Translation(lambda s: s[1], shift))
+    assert final == ((10**9 + 1) % 3, (10**9 + 1) // 3 * 2)